@@ -1,16 +1,15 @@
-from model.train import train
-from scada_gui.main_window import run_main_window
-import os
-from model.train import train
+from model.background import start_background_training
+from model.training_cache import installed_train_kwargs, is_model_current
 from scada_gui.main_window import run_main_window
 
 if __name__ == '__main__':
-    # Ja modelis nav apmācīts, trenē
-    if not os.path.exists('model/artifacts/model.pkl'):
-        print("Modelis nav atrasts, uzsak trenesanu")
-        train()
+    # Ja modelis nav apmācīts vai dati/konfigurācija ir mainījušies, trenē fona procesā - GUI startējas uzreiz.
+    # Pārtrenē ar tiem pašiem train() argumentiem, ar kuriem tika apmācīts esošais modelis
+    if not is_model_current():
+        print("Modelis nav atrasts vai ir novecojis, uzsak trenesanu fona procesa")
+        start_background_training(**installed_train_kwargs())
     else:
         print("Modelis eksiste, izlaizam trenesanu")
 
     # GUI startesana
-    run_main_window()
\ No newline at end of file
+    run_main_window()
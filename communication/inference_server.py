@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lokāls prognožu serviss.
+
+Uses the same newline-delimited JSON framing as communication/server.py:
+every request is one JSON object terminated by '\n', e.g.
+
+    {"command": "predict", "value": {"temp": 22.1, "pressure": 1.03, "flow": 100.2}}
+    {"command": "predict_batch", "value": [{"temp": ...}, [22.1, 1.03, 100.2], ...]}
+    {"command": "stats"}
+
+and every response is one JSON object terminated by '\n'. The model stays
+resident, and requests that arrive from all clients within one tick are
+coalesced into a single vectorized model call.
+
+With CONFIG['features'] enabled every connection is one stream of raw
+readings: each must carry its "timestamp", and the rolling features are
+computed from that connection's previous readings only.
+"""
+
+import argparse
+import functools
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+import logging
+
+# Ļauj palaist arī kā `python communication/inference_server.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from model.config import CONFIG
+from model.features import RollingFeatures, model_columns
+from model.predict import _model_matrix, predict_batch
+from model.registry import start_watcher
+
+# Konfigurējam logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _get_scorer(backend):
+    """
+    Returns a function X -> (labels, probabilities, classes) for the chosen
+    backend. The classes come from the forest that scored X, so they match
+    the probability columns even while a new model version is swapped in.
+    """
+    if backend == 'sklearn':
+        scorer = predict_batch
+    elif backend == 'compiled':
+        from model.compiled import predict_compiled as scorer
+    elif backend == 'fused':
+        from model.compiled import predict_fused as scorer
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+    return functools.partial(scorer, return_classes=True)
+
+
+class _PendingRequest:
+    """One request waiting for its slice of a coalesced batch."""
+
+    __slots__ = ('X', 'done', 'labels', 'probs', 'classes', 'error')
+
+    def __init__(self, X):
+        self.X = X
+        self.done = threading.Event()
+        self.labels = None
+        self.probs = None
+        self.classes = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("Prediction timed out")
+        if self.error is not None:
+            raise self.error
+        return self.labels, self.probs, self.classes
+
+
+class RequestCoalescer:
+    """
+    Collects requests from all client threads and scores them together.
+
+    The first request of a tick starts a window of `tick` seconds; every
+    request that arrives within it (up to max_rows rows) goes into the same
+    model call, and the results are split back per request.
+    """
+
+    def __init__(self, scorer, tick=0.002, max_rows=8192):
+        self.scorer = scorer
+        self.tick = tick
+        self.max_rows = max_rows
+        self.pending = queue.Queue()
+        self.running = False
+        self.thread = None
+
+        # Statistika
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.max_batch_rows = 0
+        self.busy_time = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='inference-coalescer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(1.0)
+
+    def submit(self, X):
+        request = _PendingRequest(X)
+        self.pending.put(request)
+        return request
+
+    def run(self):
+        while self.running:
+            try:
+                first = self.pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            rows = len(first.X)
+            deadline = time.monotonic() + self.tick
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request.X)
+
+            self._score(batch, rows)
+
+    def _score(self, batch, rows):
+        start = time.perf_counter()
+        try:
+            labels, probs, classes = self.scorer(np.concatenate([request.X for request in batch]))
+            classes = np.asarray(classes).tolist()
+            offset = 0
+            for request in batch:
+                n = len(request.X)
+                request.labels = labels[offset:offset + n]
+                request.probs = probs[offset:offset + n]
+                request.classes = classes
+                offset += n
+        except Exception as e:
+            logger.error(f"Error scoring batch of {rows} rows: {e}")
+            for request in batch:
+                request.error = e
+        finally:
+            self.busy_time += time.perf_counter() - start
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += rows
+            self.max_batch_rows = max(self.max_batch_rows, rows)
+            for request in batch:
+                request.done.set()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_rows": self.max_batch_rows,
+            "busy_time": self.busy_time,
+        }
+
+
+class InferenceServer:
+    """Serveris, kas apkalpo prognožu pieprasījumus"""
+
+    def __init__(self, host='localhost', port=5001, unix_path=None, backend='fused', tick=0.002):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.backend = backend
+        self.server_socket = None
+        self.clients = []
+        self.running = False
+        self.ready = threading.Event()
+        self.coalescer = RequestCoalescer(_get_scorer(backend), tick=tick)
+
+    def _create_socket(self):
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server_socket.bind(self.unix_path)
+        else:
+            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server_socket.bind((self.host, self.port))
+        server_socket.listen(64)
+        return server_socket
+
+    def start(self):
+        """Sākt servera darbību"""
+        try:
+            # Ielādējam modeli pirms pirmā pieprasījuma
+            warm_up = np.zeros((1, len(model_columns())))
+            self.coalescer.scorer(warm_up)
+            # Jaunas modeļa versijas tiek ielādētas fonā; pieprasījumi turpina ar iepriekšējo
+            start_watcher(on_change=lambda version: self.coalescer.scorer(warm_up))
+
+            self.server_socket = self._create_socket()
+            self.server_socket.settimeout(1.0)
+            self.running = True
+            self.coalescer.start()
+            address = self.unix_path or f"{self.host}:{self.port}"
+            logger.info(f"Inference server started on {address} (backend: {self.backend})")
+            self.ready.set()
+
+            while self.running:
+                try:
+                    client_socket, client_address = self.server_socket.accept()
+                except socket.timeout:
+                    continue
+                except Exception as e:
+                    if self.running:
+                        logger.error(f"Error accepting connection: {e}")
+                    continue
+
+                client_address = client_address or self.unix_path
+                logger.info(f"New connection from {client_address}")
+                client_thread = threading.Thread(
+                    target=self.handle_client,
+                    args=(client_socket, client_address),
+                    daemon=True
+                )
+                client_thread.start()
+                self.clients.append((client_socket, client_thread))
+
+        except Exception as e:
+            logger.error(f"Error starting inference server: {e}")
+        finally:
+            self.cleanup()
+
+    def handle_client(self, client_socket, client_address):
+        """Apstrādāt klienta savienojumu atsevišķā pavedienā"""
+        try:
+            client_socket.settimeout(1.0)
+            if client_socket.family != getattr(socket, 'AF_UNIX', None):
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            buffer = b""
+            # Slīdošo pazīmju stāvoklis: katrs savienojums ir viena rādījumu plūsma
+            features = RollingFeatures() if CONFIG['features']['enabled'] else None
+            while self.running:
+                try:
+                    data = client_socket.recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    logger.info(f"Client {client_address} disconnected")
+                    break
+
+                buffer += data
+                *lines, buffer = buffer.split(b'\n')
+
+                # Submit every complete line first, so pipelined requests share a batch
+                submitted = [self.submit_command(line, features) for line in lines if line.strip()]
+                responses = [self.finish_command(item) for item in submitted]
+                if responses:
+                    client_socket.sendall(b''.join(
+                        (json.dumps(response) + '\n').encode('utf-8') for response in responses))
+
+        except Exception as e:
+            logger.error(f"Client handler error for {client_address}: {e}")
+        finally:
+            try:
+                client_socket.close()
+            except:
+                pass
+
+    def submit_command(self, line, features=None):
+        """Parsē komandu un, ja vajag, nodod to prognožu rindai"""
+        try:
+            command_data = json.loads(line)
+            command = command_data.get('command', '').lower()
+            value = command_data.get('value', None)
+
+            if command == 'predict':
+                return command, self.coalescer.submit(_model_matrix([value], features))
+            if command == 'predict_batch':
+                return command, self.coalescer.submit(_model_matrix(value, features))
+            if command == 'stats':
+                return command, None
+            return command, ValueError("Unknown command")
+        except json.JSONDecodeError:
+            return None, ValueError("Invalid JSON")
+        except Exception as e:
+            return None, e
+
+    def finish_command(self, submitted):
+        """Sagaida rezultātu un sagatavo atbildi"""
+        command, pending = submitted
+        try:
+            if isinstance(pending, Exception):
+                raise pending
+
+            if command == 'stats':
+                return dict(self.coalescer.stats(), status="ok")
+
+            labels, probs, classes = pending.wait(timeout=30)
+            if command == 'predict':
+                return {
+                    "status": "ok",
+                    "label": labels.tolist()[0],
+                    "probabilities": dict(zip(classes, probs[0].tolist())),
+                }
+            return {
+                "status": "ok",
+                "classes": classes,
+                "labels": labels.tolist(),
+                "probabilities": probs.tolist(),
+            }
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+    def cleanup(self):
+        """Iztīrīt resursus un apturēt serveri"""
+        self.running = False
+        self.coalescer.stop()
+        for client_socket, _ in self.clients:
+            try:
+                client_socket.close()
+            except:
+                pass
+        if self.server_socket:
+            try:
+                self.server_socket.close()
+            except:
+                pass
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        logger.info("Inference server cleanup complete")
+
+
+class InferenceClient:
+    """Vienkāršs klients prognožu servisam"""
+
+    def __init__(self, host='localhost', port=5001, unix_path=None, timeout=30):
+        if unix_path:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(unix_path)
+        else:
+            self.socket = socket.create_connection((host, port))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(timeout)
+        self.buffer = b""
+
+    def _request(self, command, value=None):
+        cmd = {"command": command}
+        if value is not None:
+            cmd["value"] = value
+        self.socket.sendall((json.dumps(cmd) + '\n').encode('utf-8'))
+
+        while b'\n' not in self.buffer:
+            data = self.socket.recv(65536)
+            if not data:
+                raise ConnectionError("Inference server closed the connection")
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b'\n', 1)
+
+        response = json.loads(line)
+        if response.get("status") != "ok":
+            raise RuntimeError(response.get("error", "Unknown error"))
+        return response
+
+    def predict(self, sample):
+        """sample = {'temp': float, 'pressure': float, 'flow': float}; returns the label"""
+        return self._request("predict", sample)["label"]
+
+    def predict_batch(self, samples):
+        """samples - list of dicts or (temp, pressure, flow) lists; returns (labels, probabilities)"""
+        response = self._request("predict_batch", samples)
+        return response["labels"], response["probabilities"]
+
+    def stats(self):
+        return self._request("stats")
+
+    def close(self):
+        try:
+            self.socket.close()
+        except:
+            pass
+
+
+def run_benchmark(host='localhost', port=5001, unix_path=None, clients=8, requests=200, batch_size=1):
+    """
+    Throughput benchmark: `clients` threads each send `requests` blocking
+    requests (predict, or predict_batch of batch_size rows) and wait for
+    every answer before sending the next one.
+    """
+    from model.columnar import open_input_store
+
+    samples = open_input_store().to_frame(CONFIG['data']['feature_columns']).to_dict('records')
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        client = InferenceClient(host, port, unix_path)
+        own = []
+        try:
+            for i in range(requests):
+                start = time.perf_counter()
+                if batch_size == 1:
+                    client.predict(samples[(index * requests + i) % len(samples)])
+                else:
+                    first = (index * requests + i) * batch_size % len(samples)
+                    client.predict_batch(samples[first:first + batch_size] or samples[:batch_size])
+                own.append(time.perf_counter() - start)
+        finally:
+            client.close()
+        with lock:
+            latencies.extend(own)
+
+    before = InferenceClient(host, port, unix_path)
+    stats_before = before.stats()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats_after = before.stats()
+    before.close()
+
+    latencies = np.asarray(latencies)
+    total_requests = len(latencies)
+    batches = stats_after["batches"] - stats_before["batches"]
+    rows = stats_after["rows"] - stats_before["rows"]
+    print(f"{clients} clients x {requests} requests x {batch_size} rows in {elapsed:.2f} s")
+    print(f"Throughput: {total_requests / elapsed:.0f} requests/s, {total_requests * batch_size / elapsed:.0f} rows/s")
+    print(f"Latency: median {np.median(latencies) * 1e3:.2f} ms, p95 {np.percentile(latencies, 95) * 1e3:.2f} ms, "
+          f"p99 {np.percentile(latencies, 99) * 1e3:.2f} ms")
+    print(f"Model calls: {batches}, mean rows per call: {rows / batches if batches else 0:.1f}")
+
+
+server = None
+
+
+# Signālu apstrādes funkcija, lai varētu gracefully aizvērt serveri
+def signal_handler(sig, frame):
+    logger.info("Received shutdown signal, stopping inference server...")
+    if server:
+        server.running = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local inference server (newline-delimited JSON)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--unix', default=None, help='Listen on a Unix socket path instead of TCP')
+    parser.add_argument('--backend', choices=['fused', 'compiled', 'sklearn'], default='fused',
+                        help='Scoring backend (default: fused forest)')
+    parser.add_argument('--tick', type=float, default=0.002,
+                        help='Seconds to collect concurrent requests into one model call')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Start a server in this process and run the throughput benchmark against it')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    server = InferenceServer(args.host, args.port, args.unix, backend=args.backend, tick=args.tick)
+
+    if args.benchmark:
+        logger.setLevel(logging.WARNING)
+        threading.Thread(target=server.start, daemon=True).start()
+        if not server.ready.wait(60):
+            logger.error("Inference server did not start")
+            sys.exit(1)
+        try:
+            run_benchmark(args.host, args.port, args.unix, args.clients, args.requests, args.batch_size)
+        finally:
+            server.running = False
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    try:
+        server.start()
+    except KeyboardInterrupt:
+        logger.info("Inference server stopping due to keyboard interrupt")
+    finally:
+        server.running = False
+        logger.info("Inference server stopped")
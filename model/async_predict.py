@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from model.config import CONFIG
+from model.predict import _label_counts, _model_matrix, _stats, predict_batch
+
+_executor = None
+_executor_lock = threading.Lock()
+_batchers = weakref.WeakKeyDictionary()
+
+_metrics_lock = threading.Lock()
+_batch_rows = Counter()
+_metrics = {'batches': 0, 'requests': 0, 'rows': 0, 'max_batch_rows': 0, 'errors': 0}
+
+
+def _get_executor():
+    """Dedicated inference threads, so model calls never run on the event loop."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CONFIG['async']['workers'],
+                                           thread_name_prefix='predict-async')
+        return _executor
+
+
+def _record_batch(requests, rows):
+    with _metrics_lock:
+        _metrics['batches'] += 1
+        _metrics['requests'] += requests
+        _metrics['rows'] += rows
+        _metrics['max_batch_rows'] = max(_metrics['max_batch_rows'], rows)
+        # Batch sizes bucketed by power of two: 1, 2, 4, ...
+        _batch_rows[1 << max(rows - 1, 0).bit_length()] += 1
+
+
+class _AsyncBatcher:
+    """
+    Groups the requests of one event loop into vectorized model calls.
+
+    The first request starts a window of `window` seconds; every request
+    awaited within it (up to max_rows rows) is scored in the same
+    predict_batch() call on the executor, and the results are split back.
+    """
+
+    def __init__(self, loop, window, max_rows):
+        self.loop = loop
+        self.window = window
+        self.max_rows = max_rows
+        self.pending = []
+        self.rows = 0
+        self.handle = None
+
+    def submit(self, X):
+        future = self.loop.create_future()
+        self.pending.append((X, future, time.perf_counter()))
+        self.rows += len(X)
+        if self.rows >= self.max_rows:
+            self.flush()
+        elif self.handle is None:
+            self.handle = self.loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        batch, rows = self.pending, self.rows
+        self.pending, self.rows = [], 0
+        if not batch:
+            return
+
+        X = np.concatenate([X for X, _, _ in batch]) if len(batch) > 1 else batch[0][0]
+        scored = self.loop.run_in_executor(_get_executor(), predict_batch, X)
+        scored.add_done_callback(lambda result: self.deliver(batch, rows, result))
+
+    def deliver(self, batch, rows, result):
+        error = result.exception()
+        if error is not None:
+            with _metrics_lock:
+                _metrics['errors'] += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        labels, probs = result.result()
+        _record_batch(len(batch), rows)
+        now = time.perf_counter()
+        offset = 0
+        for X, future, start in batch:
+            end = offset + len(X)
+            request_labels = labels[offset:end]
+            _stats.record('predict_async', now - start, _label_counts(request_labels))
+            if not future.done():
+                future.set_result((request_labels, probs[offset:end]))
+            offset = end
+
+
+def _get_batcher():
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        settings = CONFIG['async']
+        batcher = _batchers[loop] = _AsyncBatcher(loop, settings['window'], settings['max_rows'])
+    return batcher
+
+
+async def predict_many_async(samples, features=None):
+    """
+    Coroutine version of predict_batch(); the event loop is never blocked.
+    Requests awaited concurrently within CONFIG['async']['window'] seconds are
+    scored together in one vectorized call.
+    :param features: with CONFIG['features'] enabled, the RollingFeatures of
+                     the stream the raw readings continue (see predict())
+    :return: (labels, probabilities)
+    """
+    X = _model_matrix(samples, features)
+    if len(X) == 0:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), predict_batch, X)
+    return await _get_batcher().submit(X)
+
+
+async def predict_async(sample: dict, features=None):
+    """
+    Coroutine version of predict() for a single
+    sample = {'temp': float, 'pressure': float, 'flow': float}
+    :return: predicted label
+    """
+    labels, _ = await predict_many_async([sample], features)
+    return labels[0]
+
+
+def get_async_stats():
+    """
+    Returns batching counters (batches, requests, rows, mean and max rows per
+    batch, batch size distribution) and the per-request latency summary.
+    """
+    with _metrics_lock:
+        stats = dict(_metrics)
+        stats['batch_rows'] = dict(sorted(_batch_rows.items()))
+    stats['mean_batch_rows'] = stats['rows'] / stats['batches'] if stats['batches'] else 0.0
+    stats['mean_requests_per_batch'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+    stats['latency'] = _stats.snapshot()['latency'].get('predict_async')
+    return stats
+
+
+def reset_async_stats():
+    with _metrics_lock:
+        _batch_rows.clear()
+        for key in _metrics:
+            _metrics[key] = 0
@@ -0,0 +1,158 @@
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _training_worker(events, kwargs):
+    """Runs train() in the worker process and reports its stages on the events queue."""
+    def progress(stage, fraction):
+        events.put({'state': 'training', 'stage': stage, 'progress': fraction, 'time': time.time()})
+
+    try:
+        from model.train import train
+        train(progress=progress, **kwargs)
+    except Exception as e:
+        events.put({'state': 'failed', 'stage': None, 'error': f"{type(e).__name__}: {e}", 'time': time.time()})
+        raise
+    events.put({'state': 'done', 'stage': 'done', 'progress': 1.0, 'time': time.time()})
+
+
+class BackgroundTrainer:
+    """
+    Trains the model in a separate process so the caller (GUI) stays responsive.
+
+    The worker reports progress events ({'state', 'stage', 'progress', ...})
+    over a queue; a monitor thread keeps the latest status and forwards each
+    event to the registered listeners. Listeners run on the monitor thread,
+    so GUI code should poll status() from its own event loop instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = None
+        self._listeners = []
+        self._stop_registered = False
+        self._status = {'state': 'idle', 'stage': None, 'progress': 0.0, 'error': None,
+                        'started': None, 'finished': None}
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def start(self, **kwargs):
+        """
+        Starts training with train(**kwargs) unless it is already running.
+        :return: False if a training run was already in progress
+        """
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return False
+
+            context = multiprocessing.get_context('spawn')
+            events = context.Queue()
+            # Not a daemon: daemonic processes may not start the model's own worker pool
+            self._process = context.Process(target=_training_worker, args=(events, kwargs),
+                                            name='model-training')
+            self._status = {'state': 'training', 'stage': 'starting', 'progress': 0.0, 'error': None,
+                            'started': time.time(), 'finished': None}
+            self._process.start()
+
+            # Registered after multiprocessing's own exit handler, so it runs
+            # first and the exit does not wait for training to finish
+            if not self._stop_registered:
+                atexit.register(self.stop)
+                self._stop_registered = True
+
+        threading.Thread(target=self._monitor, args=(self._process, events),
+                         name='model-training-monitor', daemon=True).start()
+        logger.info("Model training started in the background")
+        return True
+
+    def _update(self, event):
+        with self._lock:
+            self._status.update(event)
+            if event['state'] in ('done', 'failed'):
+                self._status['finished'] = time.time()
+            status = dict(self._status)
+        for callback in list(self._listeners):
+            try:
+                callback(status)
+            except Exception as e:
+                logger.error(f"Training listener failed: {e}")
+
+    def _monitor(self, process, events):
+        finished = False
+        while not finished:
+            try:
+                event = events.get(timeout=0.5)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Drain events sent just before exit, then check how it ended
+                try:
+                    event = events.get(timeout=0.5)
+                except queue.Empty:
+                    event = {'state': 'failed', 'stage': None,
+                             'error': f"Training process exited with code {process.exitcode}"}
+            finished = event['state'] in ('done', 'failed')
+            self._update(event)
+
+        process.join()
+        if event['state'] == 'done':
+            logger.info(f"Model training finished in {self._status['finished'] - self._status['started']:.1f} s")
+        else:
+            logger.error(f"Model training failed: {event.get('error')}")
+
+    def is_training(self):
+        with self._lock:
+            return self._status['state'] == 'training'
+
+    def status(self):
+        """Latest event: state ('idle', 'training', 'done', 'failed'), stage, progress 0..1, error."""
+        with self._lock:
+            status = dict(self._status)
+        if status['started'] is not None:
+            status['elapsed'] = (status['finished'] or time.time()) - status['started']
+        return status
+
+    def stop(self):
+        """Terminates a running training process (e.g. when the application exits)."""
+        with self._lock:
+            process = self._process
+        if process is not None and process.is_alive():
+            logger.info("Stopping background model training")
+            process.terminate()
+            process.join(5)
+
+    def wait(self, timeout=None):
+        """Blocks until the current training run has finished; returns the final status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_training():
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        return self.status()
+
+
+_trainer = BackgroundTrainer()
+
+
+def start_background_training(**kwargs):
+    """Starts train(**kwargs) in a background process; see BackgroundTrainer."""
+    return _trainer.start(**kwargs)
+
+
+def is_training():
+    return _trainer.is_training()
+
+
+def get_training_status():
+    return _trainer.status()
+
+
+def add_training_listener(callback):
+    _trainer.add_listener(callback)
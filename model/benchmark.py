@@ -0,0 +1,729 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from model.config import CONFIG
+
+
+def _timeit(func, repeat):
+    """Returns per-call latencies in seconds."""
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def _report(name, times, rows=1):
+    per_row = np.median(times) / rows
+    print(f"{name:<38} median {np.median(times) * 1e3:9.3f} ms   "
+          f"p95 {np.percentile(times, 95) * 1e3:9.3f} ms   "
+          f"{per_row * 1e6:9.2f} us/row   {rows / np.median(times):12.0f} rows/s")
+
+
+def _load_samples(n):
+    from model.columnar import open_input_store
+
+    samples = open_input_store().to_frame(CONFIG['data']['feature_columns'])
+    reps = int(np.ceil(n / len(samples)))
+    return pd.concat([samples] * reps, ignore_index=True).iloc[:n]
+
+
+def benchmark_latency(batch_size=1000, repeat=20):
+    """Single-row and batched latency: predict() vs predict_batch() vs compiled forest."""
+    from model.predict import predict, predict_batch
+    from model.compiled import load_compiled, predict_compiled
+
+    samples = _load_samples(batch_size)
+    row = samples.iloc[0].to_dict()
+
+    # Warm up artifacts so load time is not measured
+    predict_batch(samples.head(1))
+    compiled = load_compiled()
+    print(f"Forest: {compiled.n_estimators} trees, {compiled.n_nodes} nodes, "
+          f"max depth {compiled.max_depth}\n")
+
+    print("Single row:")
+    _report("predict()", _timeit(lambda: predict(row), repeat))
+    _report("predict_batch() 1 row", _timeit(lambda: predict_batch([row]), repeat))
+    _report("predict_compiled() 1 row", _timeit(lambda: predict_compiled([row]), repeat))
+
+    print(f"\nBatch of {batch_size} rows:")
+    _report("predict_batch()", _timeit(lambda: predict_batch(samples), repeat), batch_size)
+    _report("predict_compiled()", _timeit(lambda: predict_compiled(samples), repeat), batch_size)
+
+    labels, _ = predict_batch(samples)
+    compiled_labels, _ = predict_compiled(samples)
+    mismatches = int((labels != compiled_labels).sum())
+    print(f"\nLabel mismatches compiled vs sklearn: {mismatches} / {batch_size}")
+
+
+def _boundary_samples(fused, base, n):
+    """Samples whose features sit exactly on, and one ulp around, fused split thresholds."""
+    rng = np.random.RandomState(0)
+    internal = np.flatnonzero(~fused.is_leaf)
+    nodes = rng.choice(internal, size=n)
+    X = base[rng.randint(len(base), size=n)].copy()
+    values = fused.threshold[nodes]
+    offsets = rng.choice([-1, 0, 1], size=n)
+    values = np.where(offsets < 0, np.nextafter(values, -np.inf),
+                      np.where(offsets > 0, np.nextafter(values, np.inf), values))
+    X[np.arange(n), fused.feature[nodes]] = values
+    return X
+
+
+def benchmark_fused(n_random=20000, repeat=20):
+    """Equivalence and latency of the fused forest vs the scaler-plus-model path."""
+    from model.predict import predict_batch
+    from model.compiled import load_compiled, predict_compiled, predict_fused
+
+    base = _load_samples(1000).to_numpy(dtype=np.float64)
+    fused = load_compiled(fused=True)
+    rng = np.random.RandomState(42)
+
+    low, high = base.min(axis=0), base.max(axis=0)
+    span = high - low
+    checks = [
+        ("training data", base),
+        ("random over 1.5x range", rng.uniform(low - span / 4, high + span / 4, (n_random, base.shape[1]))),
+        ("on split thresholds", _boundary_samples(fused, base, n_random)),
+    ]
+
+    print("Equivalence vs scaler + sklearn model:")
+    for name, X in checks:
+        labels, probs = predict_batch(X)
+        fused_labels, fused_probs = predict_fused(X)
+        mismatches = int((labels != fused_labels).sum())
+        print(f"  {name:<24} {len(X):8d} rows   label mismatches {mismatches:6d}   "
+              f"max |dp| {np.abs(probs - fused_probs).max():.2e}")
+
+    row = base[:1]
+    print("\nSingle row:")
+    _report("predict_batch() (scaler + sklearn)", _timeit(lambda: predict_batch(row), repeat))
+    _report("predict_compiled() (scaler + tables)", _timeit(lambda: predict_compiled(row), repeat))
+    _report("predict_fused() (raw features)", _timeit(lambda: predict_fused(row), repeat))
+
+
+def benchmark_early_exit(batch_size=1000, repeat=10, block_size=25, confidence=0.99):
+    """Trees evaluated, latency and label agreement of early-exit voting vs the full fused forest."""
+    from model.compiled import load_compiled, predict_early_exit, predict_fused
+
+    samples = _load_samples(batch_size)
+    fused = load_compiled(fused=True)
+    labels, _ = predict_fused(samples)
+    print(f"Forest: {fused.n_estimators} trees, block size {block_size}\n")
+
+    for mode, conf in (("exact", None), (f"confidence {confidence}", confidence)):
+        early_labels, _, evaluated = predict_early_exit(samples, block_size=block_size, confidence=conf)
+        print(f"{mode}:")
+        for label in fused.classes_:
+            mask = early_labels == label
+            if mask.any():
+                print(f"  {str(label):<8} {int(mask.sum()):6d} rows   mean trees evaluated "
+                      f"{evaluated[mask].mean():6.1f}")
+        print(f"  label mismatches vs full forest: {int((early_labels != labels).sum())} / {len(labels)}")
+
+        row = samples.iloc[:1]
+        _report("  early exit, 1 row", _timeit(
+            lambda: predict_early_exit(row, block_size=block_size, confidence=conf), repeat))
+        _report("  early exit, batch", _timeit(
+            lambda: predict_early_exit(samples, block_size=block_size, confidence=conf), repeat), batch_size)
+
+    print("full forest:")
+    _report("  predict_fused(), 1 row", _timeit(lambda: predict_fused(samples.iloc[:1]), repeat))
+    _report("  predict_fused(), batch", _timeit(lambda: predict_fused(samples), repeat), batch_size)
+
+
+def benchmark_async(clients=100, requests=20):
+    """Concurrent predict_async() awaiters vs the same number of sequential predict() calls."""
+    import asyncio
+    from model.predict import predict
+    from model.async_predict import get_async_stats, predict_async, reset_async_stats
+
+    rows = _load_samples(clients * requests).to_dict('records')
+    predict(rows[0])
+
+    start = time.perf_counter()
+    for row in rows[:requests]:
+        predict(row)
+    sequential = (time.perf_counter() - start) / requests
+    print(f"predict() sequential: {sequential * 1e3:.2f} ms/request, {1 / sequential:.0f} requests/s")
+
+    async def client(offset):
+        for row in rows[offset::clients]:
+            await predict_async(row)
+
+    async def main():
+        await asyncio.gather(*(client(i) for i in range(clients)))
+
+    reset_async_stats()
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    stats = get_async_stats()
+    latency = stats['latency']
+    print(f"predict_async() {clients} concurrent clients: {len(rows) / elapsed:.0f} requests/s, "
+          f"{stats['batches']} batches, {stats['mean_batch_rows']:.1f} rows/batch (max {stats['max_batch_rows']})")
+    print(f"  request latency p50 {latency['p50_us'] / 1e3:.2f} ms   p99 {latency['p99_us'] / 1e3:.2f} ms")
+    print(f"  batch size distribution: {stats['batch_rows']}")
+
+
+def benchmark_store(repeat=20):
+    """CSV parsing vs columnar store reads of the training data."""
+    from model.columnar import open_input_store, open_processed_store
+
+    columns = CONFIG['data']['feature_columns']
+    target = CONFIG['data']['target_column']
+    date_columns = CONFIG['data']['date_columns']
+    store = open_input_store()
+    print(f"Training data: {store.rows} rows, columns {store.columns}\n")
+
+    def csv_all():
+        df = pd.read_csv(CONFIG['data']['input_path'])
+        for name, fmt in date_columns.items():
+            if name in df.columns:
+                df[name] = pd.to_datetime(df[name], format=fmt)
+        return df
+
+    _report("read_csv + parse timestamps", _timeit(csv_all, repeat), store.rows)
+    _report("store.to_frame() all columns", _timeit(lambda: open_input_store().to_frame(), repeat), store.rows)
+    _report("read_csv features + label",
+            _timeit(lambda: pd.read_csv(CONFIG['data']['input_path'], usecols=columns + [target]), repeat), store.rows)
+    _report("store.to_frame() features + label",
+            _timeit(lambda: open_input_store().to_frame(columns + [target]), repeat), store.rows)
+    _report("store.matrix() features (mmap)",
+            _timeit(lambda: open_input_store().matrix(columns), repeat), store.rows)
+    if os.path.exists(CONFIG['data']['processed_path']):
+        _report("read_csv processed data",
+                _timeit(lambda: pd.read_csv(CONFIG['data']['processed_path']), repeat), store.rows)
+    _report("store.to_frame() processed data",
+            _timeit(lambda: open_processed_store().to_frame(), repeat), store.rows)
+
+
+
+def _simulator_stream(n, seed=0):
+    """Readings that evolve like communication.server.ProcessSimulator, 5 per second."""
+    rng = np.random.RandomState(seed)
+    values = np.empty((n, 3))
+    temperature, pressure, level = 25.0, 0.0, 0.0
+    setpoint_temperature, setpoint_pressure = 60.0, 40.0
+    for i in range(n):
+        if i % 500 == 0:
+            setpoint_temperature, setpoint_pressure = rng.uniform(20, 80), rng.uniform(10, 90)
+        temperature += (setpoint_temperature - temperature) * 0.1 + rng.uniform(-1, 1) * 0.5
+        pressure += (setpoint_pressure - pressure) * 0.2 + rng.uniform(-1, 1) * 1.0
+        level = max(0, min(100, level + (temperature - 25) * 0.01 + (pressure - 50) * 0.005))
+        values[i] = temperature, pressure, level
+    return values, 1.7e9 + 0.2 * np.arange(n)
+
+
+def benchmark_features(rows=100000, stream=10000, repeat=5):
+    """Per-sample cost and batch/online equivalence of the rolling feature stage."""
+    from model.columnar import open_input_store
+    from model.features import RollingFeatures, check_equivalence
+
+    settings = CONFIG['features']
+    store = open_input_store()
+    values = store.matrix(settings['columns'])
+    timestamps = np.asarray(store.column(settings['timestamp_column']))
+    sim_columns = ['temperature', 'pressure', 'level']
+    sim_values, sim_timestamps = _simulator_stream(stream)
+
+    print(f"Windows {settings['windows']}, {len(RollingFeatures().names)} features\n")
+    print("Max |difference| against one-shot transform() (0 = bit-identical):")
+    for name, (X, ts, columns) in (("training CSV", (values, timestamps, None)),
+                                   ("simulator stream", (sim_values, sim_timestamps, sim_columns))):
+        differences = check_equivalence(X, ts, columns=columns)
+        print(f"  {name:<18} " + "   ".join(f"{path} {diff:g}" for path, diff in differences.items()))
+
+    def online(features, X, ts):
+        features.reset()
+        for row, t in zip(X, ts):
+            features.update(row, t)
+
+    def online_samples(features, samples, ts):
+        features.reset()
+        for sample, t in zip(samples, ts):
+            features.update_sample(sample, t)
+
+    print(f"\nOnline, {stream} simulator readings:")
+    features = RollingFeatures(columns=sim_columns)
+    samples = [dict(zip(sim_columns, row)) for row in sim_values.tolist()]
+    _report("update()", _timeit(lambda: online(features, sim_values, sim_timestamps), repeat), stream)
+    _report("update_sample() dict", _timeit(lambda: online_samples(features, samples, sim_timestamps), repeat), stream)
+    for windows in ([5], [50], [500], [5000]):
+        features = RollingFeatures(columns=sim_columns, windows=windows)
+        _report(f"update() window {windows[0]}", _timeit(lambda: online(features, sim_values, sim_timestamps), repeat),
+                stream)
+
+    reps = int(np.ceil(rows / len(values)))
+    X = np.tile(values, (reps, 1))[:rows]
+    ts = 3600.0 * np.arange(rows)
+    features = RollingFeatures()
+
+    def batch():
+        features.reset()
+        features.transform(X, ts)
+
+    print(f"\nBatch, {rows} rows:")
+    _report("transform()", _timeit(batch, repeat), rows)
+
+
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('sklearn', 'pandas', 'imblearn', 'scipy', 'joblib') if m in sys.modules]
+print(json.dumps({{'ms': elapsed * 1e3, 'heavy': heavy}}))
+'''
+
+
+def _import_time(statement, repeat):
+    """Median milliseconds to run `statement` in a fresh interpreter, and the heavy modules it loaded."""
+    import json
+    import subprocess
+    import sys
+    from model.config import BASE_DIR
+
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(statement=statement)],
+                                cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    return float(np.median([r['ms'] for r in results])), results[-1]['heavy']
+
+
+def benchmark_imports(repeat=5):
+    """Cold import time of the model package modules in fresh interpreters."""
+    statements = [
+        ('import model.config', 'import model.config'),
+        ('import model.predict', 'import model.predict'),
+        ('import model.compiled', 'import model.compiled'),
+        ('import model.async_predict', 'import model.async_predict'),
+        ('import model.evaluate', 'import model.evaluate'),
+        ('import model.train', 'import model.train'),
+        ('eager sklearn + pandas + imblearn',
+         'import sklearn.ensemble, pandas, imblearn.over_sampling'),
+        ('import model.predict + first predict()',
+         'import model.predict; model.predict.predict({\'temp\': 50.0, \'pressure\': 5.0, \'flow\': 25.0})'),
+        ('import model.compiled + first predict_fused()',
+         'import model.compiled; model.compiled.predict_fused([[50.0, 5.0, 25.0]])'),
+    ]
+    for name, statement in statements:
+        ms, heavy = _import_time(statement, repeat)
+        print(f"{name:<46} {ms:9.1f} ms   loaded: {', '.join(heavy) or '-'}")
+
+
+def _memory_kb():
+    """Rss and private memory of this process in kB (Linux /proc), or None."""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def _artifact_worker(mode, index, loaded, barrier, results):
+    """Loads the model in one of the artifact formats and reports load time and memory growth."""
+    import joblib
+    from model.compiled import CompiledForest
+
+    before = _memory_kb()
+    start = time.perf_counter()
+    if mode == 'pickle':
+        model = joblib.load(CONFIG['artifacts']['model_path'])
+    else:
+        forest = CompiledForest.load(CONFIG['artifacts']['compiled_path'],
+                                     mmap_mode='r' if mode == 'mmap' else None)
+        # Touch every page of the node tables so all of them count as resident
+        for name in CompiledForest.ARRAYS:
+            np.asarray(getattr(forest, name)).sum()
+    load_time = time.perf_counter() - start
+
+    loaded.set()
+    # Measure while all processes are alive, so shared pages are split between them
+    barrier.wait()
+    after = _memory_kb()
+    results.put((index, load_time, before, after))
+    barrier.wait()
+    if mode == 'pickle':
+        del model
+
+
+def benchmark_artifacts(processes=4):
+    """Load time and per-process memory of pickled vs copied vs memory-mapped artifacts."""
+    import multiprocessing
+    from model.compiled import load_compiled
+
+    # Make sure the compiled artifact exists and the page cache is warm
+    load_compiled()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{processes} processes per format (memory in MB, measured while all are alive)\n")
+    print(f"{'format':<8} {'proc':>4} {'load ms':>9} {'RSS +':>8} {'private +':>10} {'shared +':>9}")
+
+    for mode in ('pickle', 'copy', 'mmap'):
+        barrier = context.Barrier(processes)
+        results = context.Queue()
+        # Keep the events referenced until the workers have unpickled them
+        loaded = [context.Event() for _ in range(processes)]
+        workers = []
+        for i in range(processes):
+            worker = context.Process(target=_artifact_worker, args=(mode, i, loaded[i], barrier, results))
+            worker.start()
+            workers.append(worker)
+            if i == 0:
+                # The first process loads alone; the rest start once it is resident
+                loaded[0].wait()
+
+        rows = sorted(results.get() for _ in range(processes))
+        for worker in workers:
+            worker.join()
+
+        for i, load_time, before, after in rows:
+            if before is None or after is None:
+                print(f"{mode:<8} {i:>4} {load_time * 1e3:9.2f}   (memory stats need Linux /proc)")
+                continue
+            delta = {key: (after[key] - before[key]) / 1024 for key in before}
+            print(f"{mode:<8} {i:>4} {load_time * 1e3:9.2f} {delta['rss']:8.2f} "
+                  f"{delta['private']:10.2f} {delta['rss'] - delta['private']:9.2f}")
+
+
+
+def _rss_kb():
+    """(current, peak) resident set size of this process in kB (Linux /proc), or None."""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    name, value = line.split()[:2]
+                    values[name[:-1]] = int(value)
+    except OSError:
+        return None
+    return values.get('VmRSS'), values.get('VmHWM')
+
+
+def _reset_peak_rss():
+    """Resets the peak RSS (VmHWM) of this process; False where the kernel does not support it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def _measure(stages, name, func, *args, **kwargs):
+    """
+    Runs one pipeline stage and records its wall time and peak memory in stages[name].
+    A stage that rejects its input (ValueError) is recorded with the error and returns None.
+    """
+    import gc
+
+    gc.collect()
+    reset = _reset_peak_rss()
+    before = _rss_kb()
+    start = time.perf_counter()
+    error = None
+    try:
+        result = func(*args, **kwargs)
+    except ValueError as e:
+        result, error = None, str(e)
+    seconds = time.perf_counter() - start
+    after = _rss_kb()
+
+    entry = {'seconds': seconds, 'peak_rss_mb': None, 'peak_increase_mb': None, 'error': error}
+    if reset and before and after:
+        entry['peak_rss_mb'] = after[1] / 1024
+        entry['peak_increase_mb'] = (after[1] - before[0]) / 1024
+    stages[name] = entry
+
+    memory = (f"peak RSS {entry['peak_rss_mb']:8.1f} MB ({entry['peak_increase_mb']:+.1f})"
+              if entry['peak_rss_mb'] is not None else "peak RSS n/a")
+    print(f"  {name:<18} {seconds:10.3f} s   {memory}" + (f"   failed: {error}" if error else ""))
+    return result
+
+
+def _write_synthetic_csv(path, rows, seed=0):
+    """
+    Writes `rows` rows shaped like the training data: hourly timestamps,
+    features drawn uniformly over each column's observed range and labels
+    with the observed class shares.
+    """
+    from model.columnar import open_input_store
+
+    data = CONFIG['data']
+    real = open_input_store()
+    rng = np.random.RandomState(seed)
+
+    columns = {}
+    for name in real.columns:
+        values = np.asarray(real.column(name))
+        if name in data['date_columns']:
+            start = pd.Timestamp(values.min())
+            columns[name] = pd.date_range(start, periods=rows, freq='h').strftime(data['date_columns'][name])
+        elif name == data['target_column']:
+            classes, counts = np.unique(values, return_counts=True)
+            columns[name] = rng.choice(classes, size=rows, p=counts / counts.sum())
+        else:
+            columns[name] = rng.uniform(values.min(), values.max(), size=rows)
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def _score_test_split(model, X_test, y_test):
+    """The scoring train() does on the held-out split: probabilities, labels and metrics."""
+    from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+
+    probabilities = model.predict_proba(X_test)
+    predicted = model.classes_[np.argmax(probabilities, axis=1)]
+    return (accuracy_score(y_test, predicted), confusion_matrix(y_test, predicted),
+            classification_report(y_test, predicted))
+
+
+def _write_run(path, run):
+    import json
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(run, f, indent=4)
+    os.replace(path + '.tmp', path)
+
+
+def benchmark_training(sizes=(1000, 10000, 100000, 1000000), n_estimators=None, target_ratio=2.0,
+                       output=None, baseline=None, threshold=0.2):
+    """
+    Wall time and peak memory of each stage of the training pipeline on
+    synthetic data sets of the given sizes: CSV import, scaling, each
+    oversampler, dedup, fit, joblib.dump and test scoring.
+
+    The stages run one after another in this process (the oversamplers
+    without the process pool), so each one's time and memory is its own.
+    Results are written as JSON to `output` after every size.
+
+    :param n_estimators: trees to fit instead of CONFIG['model_params']['n_estimators']
+    :param target_ratio: balanced set cap as a multiple of the input rows
+    :param baseline: earlier results file to compare with, see compare_training_runs
+    :return: the regressions against the baseline (empty without one)
+    """
+    import json
+    import platform
+    import sys
+    import tempfile
+    import joblib
+    import sklearn
+    # Imported up front so the first oversampler is not charged for loading imblearn
+    import imblearn.over_sampling  # noqa: F401
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from model.columnar import import_csv
+    from model.config import get_model_class
+    from model.train import _OVERSAMPLERS, _run_oversampler, _combine_oversampled
+
+    data = CONFIG['data']
+    params = dict(CONFIG['model_params'])
+    if n_estimators is not None:
+        params['n_estimators'] = n_estimators
+    output = output or os.path.join(CONFIG['logging']['log_path'], 'training_benchmark.json')
+
+    run = {
+        'created': time.time(),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count(), 'numpy': np.__version__,
+                        'pandas': pd.__version__, 'sklearn': sklearn.__version__},
+        'model_params': params,
+        'target_ratio': target_ratio,
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix='training-benchmark-') as tmp:
+        for rows in sizes:
+            csv_path = os.path.join(tmp, f'{rows}.csv')
+            _write_synthetic_csv(csv_path, rows)
+            print(f"\n{rows} rows ({os.path.getsize(csv_path) / 1e6:.1f} MB CSV):")
+
+            stages = {}
+            store = _measure(stages, 'csv_read', import_csv, csv_path, os.path.join(tmp, f'{rows}-store'))
+            X = store.matrix(data['feature_columns'])
+            y = np.asarray(store.column(data['target_column']))
+
+            X_scaled = _measure(stages, 'scaling', StandardScaler().fit_transform, X)
+            classes, codes = np.unique(y, return_inverse=True)
+            X_path, y_path = os.path.join(tmp, 'X.npy'), os.path.join(tmp, 'y.npy')
+            np.save(X_path, X_scaled)
+            np.save(y_path, codes)
+
+            results = [_measure(stages, name, _run_oversampler, name,
+                                CONFIG['oversampling'][f'{name}_random_state'], X_path, y_path)
+                       for name in _OVERSAMPLERS]
+            # An oversampler with nothing to generate contributes no rows, as in prepare_data
+            results = [result for result in results if result is not None]
+            X_balanced, y_codes = _measure(stages, 'dedup', _combine_oversampled, X_scaled, codes,
+                                           results, int(rows * target_ratio))
+            del results
+
+            # Same split as train(): 10% held out
+            X_train, X_test, y_train, y_test = train_test_split(
+                X_balanced, classes[y_codes], test_size=0.1, random_state=42, shuffle=True)
+            model = _measure(stages, 'fit', get_model_class()(**params).fit, X_train, y_train)
+            _measure(stages, 'joblib_dump', joblib.dump, model, os.path.join(tmp, 'model.pkl'))
+            _measure(stages, 'test_scoring', _score_test_split, model, X_test, y_test)
+
+            total = sum(stage['seconds'] for stage in stages.values())
+            print(f"  {'total':<18} {total:10.3f} s   ({len(X_balanced)} balanced rows)")
+            run['results'].append({'rows': rows, 'balanced_rows': len(X_balanced),
+                                   'seconds': total, 'stages': stages})
+            _write_run(output, run)
+
+            del model, store, X, X_scaled, X_balanced, X_train, X_test
+            for name in os.listdir(tmp):
+                if name.endswith(('.csv', '.pkl', '.npy')):
+                    os.remove(os.path.join(tmp, name))
+
+    print(f"\nResults written to {output}")
+    if baseline is None:
+        return []
+    with open(baseline) as f:
+        return compare_training_runs(json.load(f), run, threshold=threshold)
+
+
+def compare_training_runs(baseline, current, threshold=0.2, min_seconds=0.05, min_mb=5.0):
+    """
+    Compares two benchmark_training result sets stage by stage (same row count).
+    A stage regresses when its time or peak memory increase grew by more than
+    `threshold` (relative) and more than min_seconds / min_mb (absolute, so
+    noise in very short stages is not flagged).
+    :return: list of regression descriptions
+    """
+    previous = {(result['rows'], name): stage
+                for result in baseline['results'] for name, stage in result['stages'].items()}
+
+    print(f"\n{'rows':>8} {'stage':<18} {'base s':>9} {'now s':>9} {'change':>8} "
+          f"{'base MB':>8} {'now MB':>8}")
+    regressions = []
+    for result in current['results']:
+        for name, stage in result['stages'].items():
+            old = previous.get((result['rows'], name))
+            if old is None:
+                continue
+            change = stage['seconds'] / old['seconds'] - 1 if old['seconds'] > 0 else 0.0
+            flags = []
+            if change > threshold and stage['seconds'] - old['seconds'] > min_seconds:
+                flags.append(f"time +{change:.0%}")
+
+            old_mb, new_mb = old.get('peak_increase_mb'), stage.get('peak_increase_mb')
+            if old_mb is not None and new_mb is not None and new_mb - old_mb > max(min_mb, abs(old_mb) * threshold):
+                flags.append(f"memory +{new_mb - old_mb:.1f} MB")
+
+            print(f"{result['rows']:>8} {name:<18} {old['seconds']:9.3f} {stage['seconds']:9.3f} {change:8.0%} "
+                  f"{old_mb if old_mb is not None else float('nan'):8.1f} "
+                  f"{new_mb if new_mb is not None else float('nan'):8.1f}   {', '.join(flags)}")
+            if flags:
+                regressions.append(f"{result['rows']} rows, {name}: {', '.join(flags)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        print(f"\nNo regressions beyond {threshold:.0%}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inference and training benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    latency = subparsers.add_parser('latency', help='predict() vs batched vs compiled forest latency')
+    latency.add_argument('--batch-size', type=int, default=1000)
+    latency.add_argument('--repeat', type=int, default=20)
+
+    fused = subparsers.add_parser('fused', help='fused forest equivalence and latency')
+    fused.add_argument('--rows', type=int, default=20000)
+    fused.add_argument('--repeat', type=int, default=20)
+
+    artifacts = subparsers.add_parser('artifacts', help='load time and memory of pickled vs memory-mapped artifacts')
+    artifacts.add_argument('--processes', type=int, default=4)
+
+    early_exit = subparsers.add_parser('early-exit', help='early-exit voting vs the full forest')
+    early_exit.add_argument('--batch-size', type=int, default=1000)
+    early_exit.add_argument('--repeat', type=int, default=10)
+    early_exit.add_argument('--block-size', type=int, default=25)
+    early_exit.add_argument('--confidence', type=float, default=0.99)
+
+    async_parser = subparsers.add_parser('async', help='batched predict_async() vs sequential predict()')
+    async_parser.add_argument('--clients', type=int, default=100)
+    async_parser.add_argument('--requests', type=int, default=20, help='Requests per client')
+
+    imports = subparsers.add_parser('imports', help='cold import time of the model package')
+    imports.add_argument('--repeat', type=int, default=5)
+
+    store = subparsers.add_parser('store', help='CSV parsing vs columnar store reads')
+    store.add_argument('--repeat', type=int, default=20)
+
+    features = subparsers.add_parser('features', help='rolling feature stage cost and batch/online equivalence')
+    features.add_argument('--rows', type=int, default=100000, help='Rows for the batch transform')
+    features.add_argument('--stream', type=int, default=10000, help='Readings for the online updates')
+    features.add_argument('--repeat', type=int, default=5)
+
+    training = subparsers.add_parser('training', help='time and peak memory of each training pipeline stage')
+    training.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                          help='Synthetic data set sizes in rows')
+    training.add_argument('--n-estimators', type=int, default=None,
+                          help='Trees to fit (default: CONFIG model_params)')
+    training.add_argument('--target-ratio', type=float, default=2.0,
+                          help='Balanced set cap as a multiple of the input rows')
+    training.add_argument('--output', default=None, help='Results JSON (default: logs/training_benchmark.json)')
+    training.add_argument('--baseline', default=None, help='Earlier results JSON to compare with')
+    training.add_argument('--threshold', type=float, default=0.2, help='Relative change flagged as a regression')
+
+    training_compare = subparsers.add_parser('training-compare', help='compare two training benchmark results')
+    training_compare.add_argument('baseline')
+    training_compare.add_argument('current')
+    training_compare.add_argument('--threshold', type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'latency':
+        benchmark_latency(batch_size=args.batch_size, repeat=args.repeat)
+    elif args.benchmark == 'fused':
+        benchmark_fused(n_random=args.rows, repeat=args.repeat)
+    elif args.benchmark == 'early-exit':
+        benchmark_early_exit(batch_size=args.batch_size, repeat=args.repeat,
+                             block_size=args.block_size, confidence=args.confidence)
+    elif args.benchmark == 'artifacts':
+        benchmark_artifacts(processes=args.processes)
+    elif args.benchmark == 'async':
+        benchmark_async(clients=args.clients, requests=args.requests)
+    elif args.benchmark == 'imports':
+        benchmark_imports(repeat=args.repeat)
+    elif args.benchmark == 'store':
+        benchmark_store(repeat=args.repeat)
+    elif args.benchmark == 'features':
+        benchmark_features(rows=args.rows, stream=args.stream, repeat=args.repeat)
+    elif args.benchmark in ('training', 'training-compare'):
+        if args.benchmark == 'training':
+            regressions = benchmark_training(sizes=args.sizes, n_estimators=args.n_estimators,
+                                             target_ratio=args.target_ratio, output=args.output,
+                                             baseline=args.baseline, threshold=args.threshold)
+        else:
+            import json
+            with open(args.baseline) as f:
+                baseline_run = json.load(f)
+            with open(args.current) as f:
+                current_run = json.load(f)
+            regressions = compare_training_runs(baseline_run, current_run, threshold=args.threshold)
+        if regressions:
+            parser.exit(1)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+
+class QuantizedLRUCache:
+    """
+    Bounded LRU cache of predictions keyed on quantized inputs.
+
+    Every feature is snapped to its resolution (e.g. 0.1 °C, 0.01 bar), so
+    readings that differ by less than the sensor resolution share one entry.
+    Entries are tagged with the model version they were computed with and
+    the whole cache is dropped when the version changes.
+    """
+
+    def __init__(self, columns, resolution, max_entries=4096):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.columns = list(columns)
+        self.resolution = [float(resolution[c]) for c in self.columns]
+        self.max_entries = max_entries
+        self.version = None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, sample):
+        """Quantized key of a {'temp': ..., 'pressure': ..., 'flow': ...} sample."""
+        return tuple(round(float(sample[c]) / r) for c, r in zip(self.columns, self.resolution))
+
+    def quantized_sample(self, key):
+        """The sample at the center of the key's bucket; predictions are made on it."""
+        return {c: k * r for c, k, r in zip(self.columns, key, self.resolution)}
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'resolution': dict(zip(self.columns, self.resolution)),
+            }
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from model.config import CONFIG
+from model.registry import _file_signature
+
+
+class ColumnStore:
+    """
+    Small columnar table: one typed .npy file per column plus manifest.json.
+
+    Numeric columns keep their dtype, timestamps are stored as datetime64
+    and text as fixed-width unicode, so every column can be memory-mapped
+    and read without text parsing or pickling. The manifest is written last;
+    a store is complete once it exists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def rows(self):
+        return self.manifest['rows']
+
+    @property
+    def source(self):
+        return self.manifest.get('source')
+
+    def column(self, name, mmap_mode='r'):
+        """One column as a (read-only, memory-mapped by default) array."""
+        if name not in self.manifest['columns']:
+            raise KeyError(f"Column {name!r} not in store {self.path}")
+        file_name = self.manifest['columns'][name]['file']
+        return np.load(os.path.join(self.path, file_name), mmap_mode=mmap_mode, allow_pickle=False)
+
+    def read(self, columns=None, mmap_mode='r'):
+        """{name: array} for the given columns (default: all, in stored order)."""
+        return {name: self.column(name, mmap_mode) for name in (columns or self.columns)}
+
+    def matrix(self, columns, dtype=np.float64):
+        """The given columns stacked into an (n, len(columns)) array."""
+        return np.column_stack([np.asarray(self.column(name), dtype=dtype) for name in columns])
+
+    def to_frame(self, columns=None):
+        import pandas as pd
+        return pd.DataFrame({name: np.asarray(values) for name, values in self.read(columns).items()})
+
+    @classmethod
+    def write(cls, path, columns, source=None):
+        """
+        Saves {name: array} as a store at path, replacing an existing one.
+        :param source: optional description of where the data came from
+        """
+        os.makedirs(path, exist_ok=True)
+        rows = None
+        entries = {}
+        for index, (name, values) in enumerate(columns.items()):
+            values = np.asarray(values)
+            if values.dtype == object:
+                values = values.astype(str)
+            if rows is None:
+                rows = len(values)
+            elif len(values) != rows:
+                raise ValueError(f"Column {name!r} has {len(values)} rows, expected {rows}")
+
+            file_name = f"{index:03d}.npy"
+            target = os.path.join(path, file_name)
+            with open(target + '.tmp', 'wb') as f:
+                np.save(f, values, allow_pickle=False)
+            os.replace(target + '.tmp', target)
+            entries[name] = {'file': file_name, 'dtype': values.dtype.str}
+
+        manifest = {'rows': rows or 0, 'columns': entries, 'source': source, 'created': time.time()}
+        target = os.path.join(path, 'manifest.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(target + '.tmp', target)
+        return cls(path)
+
+
+def import_csv(csv_path, store_path, date_columns=None):
+    """
+    Converts a CSV file into a ColumnStore (parsed once).
+    :param date_columns: {column: strptime format} to store as datetime64
+                         (default: CONFIG['data']['date_columns'])
+    """
+    import pandas as pd
+
+    date_columns = CONFIG['data']['date_columns'] if date_columns is None else date_columns
+    df = pd.read_csv(csv_path)
+
+    columns = {}
+    for name in df.columns:
+        values = df[name]
+        if name in date_columns:
+            values = pd.to_datetime(values, format=date_columns[name])
+        columns[name] = values.to_numpy()
+
+    source = {'path': os.path.abspath(csv_path), 'signature': list(_file_signature(csv_path))}
+    return ColumnStore.write(store_path, columns, source=source)
+
+
+def open_store(csv_path, store_path):
+    """
+    Returns the store for csv_path, importing the CSV first if the store is
+    missing or the CSV has changed since it was imported.
+    """
+    csv_signature = _file_signature(csv_path)
+    if os.path.exists(os.path.join(store_path, 'manifest.json')):
+        store = ColumnStore(store_path)
+        source = store.source or {}
+        if csv_signature is None or source.get('signature') == list(csv_signature):
+            return store
+    if csv_signature is None:
+        raise FileNotFoundError(f"Data file not found at {csv_path}")
+    return import_csv(csv_path, store_path)
+
+
+def open_input_store():
+    """Store of the training data (CONFIG['data']['input_path'])."""
+    return open_store(CONFIG['data']['input_path'], CONFIG['data']['input_store_path'])
+
+
+def open_processed_store():
+    """Scaled features written by model.train.prepare_data."""
+    return ColumnStore(CONFIG['data']['processed_store_path'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import a CSV file into a columnar .npy store')
+    parser.add_argument('csv_path', nargs='?', default=CONFIG['data']['input_path'])
+    parser.add_argument('store_path', nargs='?', default=CONFIG['data']['input_store_path'])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = import_csv(args.csv_path, args.store_path)
+    print(f"Imported {store.rows} rows x {len(store.columns)} columns into {args.store_path} "
+          f"in {time.perf_counter() - start:.2f} s")
+    for name, entry in store.manifest['columns'].items():
+        print(f"  {name:<12} {entry['dtype']}")
@@ -0,0 +1,488 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from model.config import CONFIG
+from model.registry import _file_signature, artifact_path, current_artifact_path, get_artifacts, get_registry
+
+
+_SIGN_BIT = np.int64(-2 ** 63)
+
+
+def _ordered_key(x):
+    """Maps float64 values to int64 keys with the same ordering (adjacent floats differ by 1)."""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & ~_SIGN_BIT))
+
+
+def _from_ordered_key(key):
+    """Inverse of _ordered_key."""
+    bits = np.where(key >= 0, key, (-key) | _SIGN_BIT)
+    return bits.astype(np.int64).view(np.float64)
+
+
+class CompiledForest:
+    """
+    Random forest flattened into contiguous NumPy node tables.
+
+    All trees are stored in one set of arrays (feature, threshold, left,
+    right, value) with absolute node indices; roots holds the first node of
+    each tree. Leaves point to themselves, so every tree can be walked in
+    lock-step for a whole batch with a fixed number of vectorized steps.
+
+    A fused forest has the StandardScaler folded into its thresholds and
+    scores raw (unscaled) feature values directly.
+
+    On disk a forest is a directory of uncompressed .npy files plus a
+    manifest. load() memory-maps the arrays read-only, so every process that
+    scores with the same artifact shares one physical copy in the page cache.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'children', 'is_leaf')
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth,
+                 fused=False, children=None, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.fused = bool(fused)
+        if is_leaf is None:
+            is_leaf = left == np.arange(len(left))
+        if children is None:
+            # Interleaved [left, right] pairs: next node is children[2 * node + go_right]
+            children = np.stack([left, right], axis=1).ravel()
+        self.is_leaf = is_leaf
+        self.children = children
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def prefix(self, n_trees):
+        """The forest of the first n_trees trees, sharing the node tables."""
+        return CompiledForest(self.feature, self.threshold, self.left, self.right, self.value,
+                              self.roots[:n_trees], self.classes_, self.max_depth, fused=self.fused,
+                              children=self.children, is_leaf=self.is_leaf)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flattens a fitted RandomForestClassifier."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.int32)
+            leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves and compare against +inf
+            left = np.where(leaf, node_ids, tree.children_left + offset).astype(np.int32)
+            right = np.where(leaf, node_ids, tree.children_right + offset).astype(np.int32)
+            feature = np.where(leaf, 0, tree.feature).astype(np.int32)
+            threshold = np.where(leaf, np.inf, tree.threshold)
+
+            # Older sklearn versions store weighted counts, newer ones fractions
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+        )
+
+    def save(self, path):
+        """
+        Writes the forest as a directory of .npy files and a manifest.
+        Files are written under temporary names and renamed into place, so
+        processes that have the old arrays mapped keep a consistent copy.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            target = os.path.join(path, f'{name}.npy')
+            with open(target + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+            os.replace(target + '.tmp', target)
+
+        manifest = {
+            'max_depth': self.max_depth,
+            'fused': self.fused,
+            'classes': np.asarray(self.classes_).tolist(),
+            'n_estimators': self.n_estimators,
+            'n_nodes': self.n_nodes,
+        }
+        # Manifest goes last: its signature marks a complete artifact
+        target = os.path.join(path, 'manifest.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(target + '.tmp', target)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Loads a saved forest. With mmap_mode='r' (default) the node tables are
+        memory-mapped instead of read, so loading is almost free.
+        """
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+
+        arrays = {}
+        for name in cls.ARRAYS:
+            array = np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+            # Plain ndarray view of the mapping; avoids memmap subclass overhead on indexing
+            arrays[name] = np.asarray(array)
+
+        return cls(
+            classes=np.asarray(manifest['classes']),
+            max_depth=manifest['max_depth'],
+            fused=manifest['fused'],
+            **arrays,
+        )
+
+    def apply(self, X, roots=None):
+        """
+        Returns the (n_samples, n_trees) leaf index reached in every tree.
+        roots - optional subset of tree roots to evaluate (default: all trees)
+        """
+        if roots is None:
+            roots = self.roots
+        if self.fused:
+            # Float32 rounding is already accounted for in the fused thresholds
+            X = np.asarray(X, dtype=np.float64)
+        else:
+            # sklearn compares float32 features against float64 thresholds
+            X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(roots, (len(X), len(roots))).copy()
+
+        # Leaves loop back to themselves, so max_depth steps reach every leaf
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, X, chunk_size=None):
+        """Averages leaf class fractions over all trees, like sklearn."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if chunk_size is None:
+            # Keep the (rows x trees) index matrix around a few MB
+            chunk_size = max(1, (1 << 20) // self.n_estimators)
+
+        probs = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), chunk_size):
+            nodes = self.apply(X[start:start + chunk_size])
+            probs[start:start + chunk_size] = self.value[nodes].mean(axis=1)
+        return probs
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_proba_early_exit(self, X, block_size=25, confidence=None, exact_classes=()):
+        """
+        Evaluates the trees in blocks and stops for every sample as soon as
+        the remaining trees can no longer change its predicted class.
+
+        Each tree adds at most 1 to any class's vote, so once the leader's
+        vote exceeds the runner-up's by more than the number of trees left,
+        the full forest is guaranteed to predict the same class. With
+        `confidence` (e.g. 0.99) samples may also stop earlier, when a
+        Hoeffding bound on the mean per-tree margin says the leader is
+        settled with that probability; samples whose leading class is in
+        exact_classes never stop on this bound, only on the exact one.
+
+        :return: (probabilities, trees_evaluated) - probabilities are averaged
+                 over the trees actually evaluated for each sample
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_trees = self.n_estimators
+        sums = np.zeros((len(X), len(self.classes_)))
+        evaluated = np.zeros(len(X), dtype=np.int64)
+        exact = np.isin(self.classes_, list(exact_classes))
+        if confidence is not None:
+            log_term = 2 * np.log(1 / (1 - confidence))
+
+        active = np.arange(len(X))
+        for start in range(0, n_trees, block_size):
+            roots = self.roots[start:start + block_size]
+            nodes = self.apply(X[active], roots)
+            sums[active] += self.value[nodes].sum(axis=1)
+            done_trees = start + len(roots)
+            evaluated[active] = done_trees
+
+            remaining = n_trees - done_trees
+            if remaining == 0 or len(self.classes_) < 2:
+                break
+
+            votes = sums[active]
+            order = np.argsort(votes, axis=1)
+            rows = np.arange(len(active))
+            leader = order[:, -1]
+            margin = votes[rows, leader] - votes[rows, order[:, -2]]
+
+            finished = margin > remaining
+            if confidence is not None:
+                settled = margin / done_trees > np.sqrt(log_term / done_trees)
+                finished |= settled & ~exact[leader]
+
+            active = active[~finished]
+            if len(active) == 0:
+                break
+
+        return sums / evaluated[:, None], evaluated
+
+    def fuse_scaler(self, scaler):
+        """
+        Returns a copy that scores raw features, with the scaler folded into
+        the split thresholds.
+
+        The tree sends a sample left when float32((x - mean) / scale) <= t.
+        Rounding to float32 is monotone, so this holds exactly when the
+        scaled value is below the midpoint between the largest float32 <= t
+        and the next float32. Mapping that midpoint back through the scaler
+        gives an estimate of the raw threshold, which is then refined by
+        bisection so it makes exactly the same decisions as the scaled
+        comparison.
+        """
+        if self.fused:
+            raise ValueError("Forest already has a scaler fused in")
+
+        t32 = self.threshold.astype(np.float32)
+        t32 = np.where(t32.astype(np.float64) > self.threshold,
+                       np.nextafter(t32, np.float32(-np.inf)), t32)
+        upper = np.nextafter(t32, np.float32(np.inf))
+        with np.errstate(invalid='ignore'):
+            boundary = (t32.astype(np.float64) + upper.astype(np.float64)) / 2
+            float32_step = upper.astype(np.float64) - t32.astype(np.float64)
+        boundary = np.where(np.isinf(self.threshold), self.threshold, boundary)
+
+        mean = np.asarray(scaler.mean_, dtype=np.float64)[self.feature]
+        scale = np.asarray(scaler.scale_, dtype=np.float64)[self.feature]
+        threshold = boundary * scale + mean
+
+        # Exact boundary: the largest float64 x for which the scaled
+        # comparison still goes left. The scaled decision is monotone in x,
+        # so bisect over the ordered float64 bit patterns around the estimate.
+        def goes_left(x):
+            with np.errstate(invalid='ignore', over='ignore'):
+                scaled = ((x - mean) / scale).astype(np.float32).astype(np.float64)
+            return scaled <= self.threshold
+
+        finite = np.isfinite(threshold)
+        width = np.where(finite, float32_step * scale + np.spacing(np.abs(threshold) + np.abs(mean)) * 4, 0)
+        low, high = threshold - width, threshold + width
+        for _ in range(64):
+            bad_low = finite & ~goes_left(low)
+            bad_high = finite & goes_left(high)
+            if not (bad_low.any() or bad_high.any()):
+                break
+            width = width * 2
+            low = np.where(bad_low, threshold - width, low)
+            high = np.where(bad_high, threshold + width, high)
+
+        low_key, high_key = _ordered_key(low), _ordered_key(high)
+        while True:
+            open_ = finite & (high_key - low_key > 1)
+            if not open_.any():
+                break
+            mid_key = low_key + (high_key - low_key) // 2
+            mid_left = goes_left(_from_ordered_key(mid_key))
+            low_key = np.where(open_ & mid_left, mid_key, low_key)
+            high_key = np.where(open_ & ~mid_left, mid_key, high_key)
+        threshold = np.where(finite, _from_ordered_key(low_key), threshold)
+
+        return CompiledForest(
+            feature=self.feature,
+            threshold=threshold,
+            children=self.children,
+            is_leaf=self.is_leaf,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            classes=self.classes_,
+            max_depth=self.max_depth,
+            fused=True,
+        )
+
+
+def export_compiled(model=None, path=None):
+    """
+    Flattens the trained forest and saves it next to the other artifacts.
+    :return: the CompiledForest
+    """
+    if model is None:
+        model, _ = get_artifacts()
+    path = path or CONFIG['artifacts']['compiled_path']
+
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.save(path)
+    return compiled
+
+
+def export_fused(model=None, scaler=None, path=None):
+    """
+    Flattens the trained forest with the scaler folded into the thresholds
+    and saves it as the fused artifact variant.
+    :return: the fused CompiledForest
+    """
+    if model is None or scaler is None:
+        loaded_model, loaded_scaler = get_artifacts()
+        model = loaded_model if model is None else model
+        scaler = loaded_scaler if scaler is None else scaler
+    path = path or CONFIG['artifacts']['fused_path']
+
+    fused = CompiledForest.from_sklearn(model).fuse_scaler(scaler)
+    fused.save(path)
+    return fused
+
+
+_cache_lock = threading.Lock()
+_cache = {}
+
+
+def load_compiled(path=None, fused=False):
+    """
+    Returns the compiled (or fused) forest of the current model version,
+    memory-mapped and kept resident until the artifact changes. A missing
+    working artifact is exported from the current model; published versions
+    are never modified, so a missing one raises FileNotFoundError.
+    """
+    key = 'fused_path' if fused else 'compiled_path'
+    if path is None:
+        path = current_artifact_path(key)
+    manifest_path = os.path.join(path, 'manifest.json')
+    signature = _file_signature(manifest_path)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if signature is None:
+            if os.path.abspath(path) != os.path.abspath(CONFIG['artifacts'][key]):
+                raise FileNotFoundError(f"Compiled forest not found at {path}")
+            if fused:
+                export_fused(path=path)
+            else:
+                export_compiled(path=path)
+            signature = _file_signature(manifest_path)
+        compiled = CompiledForest.load(path)
+        _cache[path] = (signature, compiled)
+        # Forests of removed model versions
+        for stale in [cached_path for cached_path in _cache if not os.path.exists(cached_path)]:
+            del _cache[stale]
+        return compiled
+
+
+def predict_compiled(samples, return_classes=False):
+    """
+    Same as predict_batch, but scored with the compiled forest.
+    :return: (labels, probabilities), plus the forest's classes with return_classes
+    """
+    from model.predict import _label_counts, _stats, _to_feature_matrix
+
+    start = time.perf_counter()
+    # Scaler and forest from the same model version, even during a swap
+    _, scaler, _, version_id = get_registry().snapshot()
+    compiled = load_compiled(artifact_path('compiled_path', version_id))
+
+    X = _to_feature_matrix(samples)
+    X_scaled = (X - scaler.mean_) / scaler.scale_
+    probs = compiled.predict_proba(X_scaled)
+    labels = compiled.classes_[np.argmax(probs, axis=1)]
+
+    _stats.record('predict_compiled', time.perf_counter() - start, _label_counts(labels))
+    if return_classes:
+        return labels, probs, compiled.classes_
+    return labels, probs
+
+
+def predict_fused(samples, return_classes=False):
+    """
+    Same as predict_batch, but scores raw features with the fused forest,
+    skipping the scaler entirely.
+    :return: (labels, probabilities), plus the forest's classes with return_classes
+    """
+    from model.predict import _label_counts, _stats, _to_feature_matrix
+
+    start = time.perf_counter()
+    fused = load_compiled(fused=True)
+    probs = fused.predict_proba(_to_feature_matrix(samples))
+    labels = fused.classes_[np.argmax(probs, axis=1)]
+
+    _stats.record('predict_fused', time.perf_counter() - start, _label_counts(labels))
+    if return_classes:
+        return labels, probs, fused.classes_
+    return labels, probs
+
+
+def predict_early_exit(samples, block_size=None, confidence=None, exact_classes=None, min_rows=None):
+    """
+    Scores raw samples with the fused forest, stopping tree evaluation per
+    sample once its class is decided (see CompiledForest.predict_proba_early_exit).
+    Without `confidence` the labels are identical to the full forest.
+    Inputs of fewer than min_rows rows (e.g. the GUI's single samples) are
+    scored with the full lock-step pass, which is faster for them.
+
+    :return: (labels, probabilities, trees_evaluated)
+    """
+    from model.predict import _label_counts, _stats, _to_feature_matrix
+
+    settings = CONFIG['early_exit']
+    if block_size is None:
+        block_size = settings['block_size']
+    if exact_classes is None:
+        exact_classes = settings['exact_classes']
+    if min_rows is None:
+        min_rows = settings['min_rows']
+
+    start = time.perf_counter()
+    fused = load_compiled(fused=True)
+    X = _to_feature_matrix(samples)
+    if len(X) < min_rows:
+        probs = fused.predict_proba(X)
+        evaluated = np.full(len(X), fused.n_estimators, dtype=np.int64)
+    else:
+        probs, evaluated = fused.predict_proba_early_exit(
+            X,
+            block_size=block_size,
+            confidence=confidence,
+            exact_classes=exact_classes,
+        )
+    labels = fused.classes_[np.argmax(probs, axis=1)]
+
+    _stats.record('predict_early_exit', time.perf_counter() - start, _label_counts(labels))
+    return labels, probs, evaluated
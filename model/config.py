@@ -1,4 +1,4 @@
-from sklearn.ensemble import RandomForestClassifier
+import importlib
 import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -7,6 +7,10 @@ CONFIG = {
     'data': {
         'input_path': os.path.join(BASE_DIR, 'data', 'training_data.csv'),
         'processed_path': os.path.join(BASE_DIR, 'data', 'processed_data.csv'),
+        # Kolonnu krātuves (.npy + manifest), sk. model.columnar
+        'input_store_path': os.path.join(BASE_DIR, 'data', 'store', 'training_data'),
+        'processed_store_path': os.path.join(BASE_DIR, 'data', 'store', 'processed_data'),
+        'date_columns': {'timestamp': '%m/%d/%Y %H:%M'},
         'feature_columns': ['temp', 'pressure', 'flow'],
         'target_column': 'label',
         'test_size': 0.15,  # Samazinaju no 0.2 uz 0.15, lai vairāk datu izmantotu apmācībai
@@ -15,14 +19,131 @@ CONFIG = {
     'artifacts': {
         'base_path': os.path.join(BASE_DIR, 'model', 'artifacts'),
         'model_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'model.pkl'),
-        'scaler_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'scaler.pkl')
+        'scaler_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'scaler.pkl'),
+        'compiled_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'forest_compiled'),
+        'fused_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'forest_fused'),
+        'lut_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'forest_lut'),
+        # Fingerprint of the data and config the live artifacts were trained from
+        'fingerprint_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'fingerprint.json'),
+        # Held-out split of the last train() run and its scores, read by model.evaluate
+        'test_set_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'test_set'),
+        'metrics_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'metrics.json'),
+        'feature_importance_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'feature_importance.csv'),
+        # Accuracy by number of trees, plotted by the statistics window
+        'history_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'training_history.pkl'),
+        # Published artifact sets (one directory per train() run) and the pointer to the live one,
+        # see model.registry.publish_version
+        'versions_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'versions'),
+        'current_path': os.path.join(BASE_DIR, 'model', 'artifacts', 'current.json')
     },
     'logging': {
         'log_path': os.path.join(BASE_DIR, 'logs')
     },
-    'model_class': RandomForestClassifier
+    # Importēts tikai apmācības laikā, sk. get_model_class()
+    'model_class': 'sklearn.ensemble.RandomForestClassifier',
+    'model_params': {
+        'n_estimators': 500,  # Palielināts no 200 uz 500
+        'max_depth': 15,      # Palielināts no 10 uz 15
+        'min_samples_split': 2,
+        'min_samples_leaf': 1,
+        'class_weight': 'balanced',
+        'random_state': 42,
+        'bootstrap': True,    # Bootstrapping uzlabos dažādību
+        'n_jobs': -1          # Izmantot visus pieejamos procesora kodolus
+    },
+    'cache': {
+        # Optional predict() result cache, see model.predict.enable_prediction_cache
+        'enabled': False,
+        'max_entries': 4096,
+        'resolution': {'temp': 0.1, 'pressure': 0.01, 'flow': 0.1}
+    },
+    'early_exit': {
+        # Trees evaluated per step by model.compiled.predict_early_exit
+        'block_size': 25,
+        # Classes that are only ever decided exactly, never on the confidence bound
+        'exact_classes': ['FAULT'],
+        # Smaller inputs get the full lock-step pass; the per-block bookkeeping
+        # only pays off from about this many rows (500 trees)
+        'min_rows': 100
+    },
+    'pruning': {
+        # Candidate forests searched by train(latency_budget=..., accuracy_tolerance=...)
+        'max_depths': [15, 12, 10, 8, 6, 4],
+        'tree_counts': [5, 10, 25, 50, 100, 200, 300, 500],
+        'latency_repeats': 30,
+        # Share of the training rows held back to compare the candidates on
+        'selection_size': 0.2
+    },
+    'async': {
+        # Batching window (seconds) and batch limit of model.async_predict
+        'window': 0.002,
+        'max_rows': 4096,
+        'workers': 1
+    },
+    'oversampling': {
+        # Random states of the oversamplers in model.train.prepare_data
+        'smote_random_state': 42,
+        'adasyn_random_state': 43,
+        'borderline_smote_random_state': 44,
+        'subsample_random_state': 42
+    },
+    'oversampling_pool': {
+        # Parallel oversamplers in prepare_data (1 = one after another, None = one per core, max 3)
+        'processes': None
+    },
+    'dataset_cache': {
+        # Balanced training sets of prepare_data, keyed by model.dataset_cache.dataset_key
+        'enabled': True,
+        'path': os.path.join(BASE_DIR, 'model', 'artifacts', 'datasets'),
+        'max_entries': 20,
+        'max_mb': 256
+    },
+    'training_cache': {
+        # Artifacts of previous train() runs, keyed by model.training_cache.training_fingerprint
+        'enabled': True,
+        'path': os.path.join(BASE_DIR, 'model', 'artifacts', 'cache'),
+        'max_entries': 5
+    },
+    'features': {
+        # Rolling means, deltas and rates of change (model.features); off = the model
+        # sees only the instantaneous readings. The lookup table needs them off.
+        'enabled': False,
+        'columns': ['temp', 'pressure', 'flow'],
+        'windows': [5, 20],
+        'timestamp_column': 'timestamp'
+    },
+    'registry': {
+        # Published versions kept besides the current one, and how often
+        # model.registry.ModelWatcher checks for a new one (seconds)
+        'keep_versions': 3,
+        'watch_interval': 1.0
+    },
+    'lut': {
+        # Grid points per feature axis for model.lut (temp, pressure, flow)
+        'shape': [32, 32, 32],
+        # Off by default: on noisy data the grid agrees with the forest on far fewer labels
+        'build_after_train': False,
+        # predict_lut falls back to the forest when the table's label agreement
+        # with it (measured at build time on the training data) is lower
+        'min_agreement': 0.99
+    }
 }
 
+def get_model_class():
+    """
+    Resolves CONFIG['model_class'] ('package.module.ClassName' or a class)
+    so the estimator library is only imported when a model is built.
+    """
+    model_class = CONFIG['model_class']
+    if isinstance(model_class, str):
+        module_name, _, class_name = model_class.rpartition('.')
+        model_class = getattr(importlib.import_module(module_name), class_name)
+    return model_class
+
+
 os.makedirs(CONFIG['artifacts']['base_path'], exist_ok=True)
+os.makedirs(CONFIG['artifacts']['versions_path'], exist_ok=True)
+os.makedirs(CONFIG['training_cache']['path'], exist_ok=True)
+os.makedirs(CONFIG['dataset_cache']['path'], exist_ok=True)
 os.makedirs(CONFIG['logging']['log_path'], exist_ok=True)
 os.makedirs(os.path.dirname(CONFIG['data']['processed_path']), exist_ok=True)
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+from model.config import CONFIG
+from model.registry import _file_hash
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever prepare_data() changes the way the balanced set is built
+DATASET_VERSION = 1
+
+
+def dataset_key(generate_more_samples, target_samples):
+    """Key of a balanced training set: input data hash, oversampling parameters and target_samples."""
+    data = CONFIG['data']
+    description = {
+        'dataset_version': DATASET_VERSION,
+        'input_sha256': _file_hash(data['input_path']),
+        'feature_columns': data['feature_columns'],
+        'target_column': data['target_column'],
+        'oversampling': CONFIG['oversampling'],
+        'features': CONFIG['features'],
+        'generate_more_samples': generate_more_samples,
+        'target_samples': target_samples,
+    }
+    encoded = json.dumps(description, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CONFIG['dataset_cache']['path'], key + '.npz')
+
+
+def load(key):
+    """
+    Returns the cached (X, y) arrays for key, or None.
+    X is float64 (n, n_features), y an object array of labels.
+    """
+    path = _entry_path(key)
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            X, y = entry['X'], entry['y'].astype(object)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Discarding unreadable cached dataset {path}: {e}")
+        os.remove(path)
+        return None
+    # Recently used entries are evicted last
+    os.utime(path)
+    return X, y
+
+
+def save(key, X, y):
+    """Stores the balanced set as an uncompressed .npz and enforces the cache limits."""
+    path = _entry_path(key)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, X=np.asarray(X, dtype=np.float64), y=np.asarray(y).astype(str))
+    os.replace(path + '.tmp', path)
+    _evict()
+
+
+def _evict():
+    """Drops least recently used entries beyond max_entries or max_mb in total."""
+    settings = CONFIG['dataset_cache']
+    root = settings['path']
+    entries = [os.path.join(root, name) for name in os.listdir(root) if name.endswith('.npz')]
+    entries.sort(key=os.path.getmtime, reverse=True)
+
+    total = 0
+    for index, path in enumerate(entries):
+        total += os.path.getsize(path)
+        if index >= settings['max_entries'] or total > settings['max_mb'] * 1e6:
+            logger.info(f"Evicting cached dataset {os.path.basename(path)}")
+            os.remove(path)
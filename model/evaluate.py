@@ -1,19 +1,18 @@
-import pandas as pd
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
-import joblib
 from model.config import CONFIG
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from model.registry import get_artifacts, current_artifact_path, _file_hash, _file_signature
+from model.columnar import ColumnStore, open_input_store, open_processed_store
+from model.features import model_columns
+from model.utils import save_metrics
+import json
 import os
+import time
 
 def load_artifacts():
     """
     Loads model and scaler artifacts.
     """
-    model_path = CONFIG['artifacts']['model_path']
-    scaler_path = CONFIG['artifacts']['scaler_path']
-
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    model_path = current_artifact_path('model_path')
+    scaler_path = current_artifact_path('scaler_path')
 
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at {model_path}")
@@ -21,51 +20,139 @@ def load_artifacts():
         raise FileNotFoundError(f"Scaler file not found at {scaler_path}")
 
     try:
-        model = joblib.load(model_path)
-        scaler = joblib.load(scaler_path)
-        return model, scaler
+        return get_artifacts()
     except Exception as e:
         raise RuntimeError(f"Error loading artifacts: {str(e)}")
 
 
+def compute_metrics(model, X_test, y_test, test_indices, model_path=None):
+    """
+    Scores the held-out split and returns the metrics, predictions and
+    probabilities as a JSON-serializable dict, tagged with the model
+    artifact they were computed for.
+    :param model_path: file the model was loaded from (default: the working model.pkl)
+    """
+    import numpy as np
+    from sklearn.metrics import accuracy_score, confusion_matrix, classification_report, f1_score
+
+    y_test = np.asarray(y_test).astype(str)
+    probabilities = model.predict_proba(X_test)
+    predictions = np.asarray(model.classes_)[np.argmax(probabilities, axis=1)].astype(str)
+    model_path = model_path or CONFIG['artifacts']['model_path']
+
+    return {
+        'model_sha256': _file_hash(model_path),
+        'model_signature': list(_file_signature(model_path)),
+        'created': time.time(),
+        'classes': np.asarray(model.classes_).astype(str).tolist(),
+        'accuracy': float(accuracy_score(y_test, predictions)),
+        'f1_weighted': float(f1_score(y_test, predictions, average='weighted')),
+        'confusion_matrix': confusion_matrix(y_test, predictions).tolist(),
+        'report': classification_report(y_test, predictions),
+        'test_size': len(y_test),
+        'test_indices': np.asarray(test_indices).tolist(),
+        'y_test': y_test.tolist(),
+        'predictions': predictions.tolist(),
+        'probabilities': np.round(probabilities, 6).tolist(),
+    }
+
+
+def _load_saved_metrics():
+    """Metrics saved by train(), or None if missing or computed for another model artifact."""
+    try:
+        with open(current_artifact_path('metrics_path')) as f:
+            metrics = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    model_path = current_artifact_path('model_path')
+    signature = _file_signature(model_path)
+    if signature is None:
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+    if metrics.get('model_signature') == list(signature):
+        return metrics
+    # Rewritten or copied with identical contents
+    if metrics.get('model_sha256') == _file_hash(model_path):
+        if model_path == CONFIG['artifacts']['model_path']:
+            # Published versions are never modified
+            metrics['model_signature'] = list(signature)
+            save_metrics(metrics)
+        return metrics
+    return None
+
+
+def _rescore_test_set():
+    """Recomputes the metrics of the current model on the held-out split saved by train()."""
+    store = ColumnStore(current_artifact_path('test_set_path'))
+    X_test = store.to_frame(model_columns())
+    y_test = store.column(CONFIG['data']['target_column'])
+    model, _ = load_artifacts()
+
+    model_path = current_artifact_path('model_path')
+    metrics = compute_metrics(model, X_test, y_test, store.column('index'), model_path=model_path)
+    if model_path == CONFIG['artifacts']['model_path']:
+        save_metrics(metrics)
+    return metrics
+
+
+def _evaluate_resplit():
+    """Vecais novērtējums modeļiem bez saglabātas testa kopas: sadala apstrādātos datus no jauna."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    # Ielādē apstrādātos datus
+    X = open_processed_store().to_frame()
+    y = pd.Series(open_input_store().column(CONFIG['data']['target_column']),
+                  name=CONFIG['data']['target_column'])
+
+    # Sadalījums treniņam un testiem
+    _, X_test, _, y_test = train_test_split(
+        X, y,
+        test_size=CONFIG['data']['test_size'],
+        random_state=CONFIG['data']['random_state'])
+
+    model, _ = load_artifacts()
+    return compute_metrics(model, X_test, y_test, X_test.index, model_path=current_artifact_path('model_path'))
+
 
 def evaluate():
+    """
+    Returns the metrics of the current model on the held-out split used by
+    train(). They are read from the metrics artifact and only recomputed
+    when the model artifact has changed since.
+    """
+    import numpy as np
+
     try:
-        # Ielādē apstrādātos datus
-        df = pd.read_csv(CONFIG['data']['processed_path'])
-        
-        # Iegūst features un label
-        X = df
-        y = pd.read_csv(CONFIG['data']['input_path'])[CONFIG['data']['target_column']]
-        
-        # Ielādē modeli un skaleri
-        model, scaler = load_artifacts()
-        
-        # Sadalījums treniņam un testiem
-        _, X_test, _, y_test = train_test_split(
-            X, y,
-            test_size=CONFIG['data']['test_size'],
-            random_state=CONFIG['data']['random_state'])
-        
-        # Prognoze
-        y_pred = model.predict(X_test)
-        
-        # Aprēķina metriku
-        accuracy = accuracy_score(y_test, y_pred)
-        conf_matrix = confusion_matrix(y_test, y_pred)
-        report = classification_report(y_test, y_pred)
-        
+        metrics = _load_saved_metrics()
+        cached = metrics is not None
+        if not cached:
+            if os.path.exists(os.path.join(current_artifact_path('test_set_path'), 'manifest.json')):
+                metrics = _rescore_test_set()
+            else:
+                metrics = _evaluate_resplit()
+
+        accuracy = metrics['accuracy']
+        conf_matrix = np.asarray(metrics['confusion_matrix'])
+        report = metrics['report']
+
         # Iespiest rezultātus
         print("Accuracy:", accuracy)
         print("Confusion matrix:\n", conf_matrix)
         print("Classification report:\n", report)
-        
+
         # Return metrics for GUI display
         return {
             'accuracy': accuracy,
             'confusion_matrix': conf_matrix,
             'report': report,
-            'test_size': len(y_test)
+            'test_size': metrics['test_size'],
+            'f1_weighted': metrics['f1_weighted'],
+            'classes': metrics['classes'],
+            'test_indices': np.asarray(metrics['test_indices']),
+            'predictions': np.asarray(metrics['predictions']),
+            'probabilities': np.asarray(metrics['probabilities']),
+            'cached': cached
         }
     except FileNotFoundError as e:
         print(f"Error: File not found - {str(e)}")
@@ -75,4 +162,7 @@ def evaluate():
         raise
 
 if __name__ == '__main__':
-    evaluate()
+    start = time.perf_counter()
+    results = evaluate()
+    print(f"Evaluated in {(time.perf_counter() - start) * 1e3:.1f} ms "
+          f"({'saved metrics' if results['cached'] else 'recomputed'})")
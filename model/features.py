@@ -0,0 +1,200 @@
+import time
+
+import numpy as np
+from model.config import CONFIG
+
+
+def feature_names(columns, windows):
+    """Names of the derived features, grouped per column: rolling means, delta, rate."""
+    names = []
+    for column in columns:
+        names += [f"{column}_mean_{window}" for window in windows]
+        names += [f"{column}_delta", f"{column}_rate"]
+    return names
+
+
+def model_columns():
+    """
+    Input columns of the model: the raw feature columns, followed by the
+    rolling features when CONFIG['features']['enabled'] is set.
+    """
+    columns = list(CONFIG['data']['feature_columns'])
+    settings = CONFIG['features']
+    if settings['enabled']:
+        columns += feature_names(settings['columns'], sorted(settings['windows']))
+    return columns
+
+
+def to_seconds(timestamps):
+    """Timestamps (datetime64 or numbers of seconds) as float seconds."""
+    timestamps = np.asarray(timestamps)
+    if np.issubdtype(timestamps.dtype, np.datetime64):
+        return timestamps.astype('datetime64[ns]').astype(np.int64) / 1e9
+    return timestamps.astype(np.float64)
+
+
+class RollingFeatures:
+    """
+    Rolling means, deltas and rates of change of a stream of readings.
+
+    The state is the running cumulative sum of every column, a ring buffer
+    with the cumulative sums of the last max(windows) readings and the
+    previous reading and timestamp. A rolling mean is the difference of two
+    cumulative sums, so update() costs the same whatever the window length.
+
+    transform() computes the features of a block of readings with NumPy and
+    continues from (and advances) the same state. Both paths perform the
+    same floating-point operations in the same order, so a stream gives
+    bit-identical features whether it is fed one reading at a time (live
+    data) or in blocks of any size (the training CSV, chunked files).
+
+    Until a window has filled, its mean is over the readings seen so far;
+    the first reading has delta and rate 0, as does any reading whose
+    timestamp does not advance.
+    """
+
+    def __init__(self, columns=None, windows=None):
+        settings = CONFIG['features']
+        self.columns = list(columns or settings['columns'])
+        self.windows = sorted(windows or settings['windows'])
+        self.names = feature_names(self.columns, self.windows)
+        self.reset()
+
+    def reset(self):
+        """Starts a new stream."""
+        self._size = max(self.windows)
+        self._ring = np.zeros((self._size, len(self.columns)))
+        self._total = np.zeros(len(self.columns))
+        self._count = 0
+        self._last = None
+        self._last_time = None
+
+    def update(self, values, timestamp):
+        """
+        Adds one reading and returns its features in the order of self.names.
+        :param values: one value per column
+        :param timestamp: seconds (e.g. time.time())
+        """
+        x = np.asarray(values, dtype=np.float64)
+        t = self._count
+        total = self._total + x
+
+        means = []
+        for window in self.windows:
+            lag = self._ring[(t - window) % self._size] if t >= window else 0.0
+            means.append((total - lag) / min(t + 1, window))
+
+        if self._last is None:
+            delta = x - x
+            dt = 0.0
+        else:
+            delta = x - self._last
+            dt = timestamp - self._last_time
+        rate = delta / dt if dt > 0 else np.zeros_like(delta)
+
+        self._ring[t % self._size] = total
+        self._total = total
+        self._count = t + 1
+        self._last = x
+        self._last_time = timestamp
+        return np.stack(means + [delta, rate], axis=1).reshape(-1)
+
+    def update_sample(self, sample, timestamp=None):
+        """
+        update() for a {column: value} reading.
+        :return: the reading extended with the derived features
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        features = self.update([sample[column] for column in self.columns], timestamp)
+        result = dict(sample)
+        result.update(zip(self.names, features.tolist()))
+        return result
+
+    def transform(self, values, timestamps):
+        """
+        Adds a block of readings and returns their features.
+        :param values: (n, len(columns)) array
+        :param timestamps: n timestamps (seconds or datetime64)
+        :return: (n, len(self.names)) array
+        """
+        X = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        ts = to_seconds(timestamps)
+        n = len(X)
+        if n == 0:
+            return np.empty((0, len(self.names)))
+        size, t0 = self._size, self._count
+
+        # Cumulative sums continued sequentially from the running total
+        sums = np.cumsum(np.vstack([self._total[None, :], X]), axis=0)[1:]
+
+        # Cumulative sums of the `size` readings before the block (zero before the stream start)
+        history = np.zeros((size, len(self.columns)))
+        previous = np.arange(t0 - size, t0)
+        known = previous >= 0
+        history[known] = self._ring[previous[known] % size]
+        extended = np.vstack([history, sums])
+
+        counts = np.arange(t0 + 1, t0 + n + 1)
+        means = [(sums - extended[size - window:size - window + n]) / np.minimum(counts, window)[:, None]
+                 for window in self.windows]
+
+        previous_x = np.vstack([X[:1] if self._last is None else self._last[None, :], X[:-1]])
+        previous_ts = np.concatenate([ts[:1] if self._last_time is None else [self._last_time], ts[:-1]])
+        delta = X - previous_x
+        dt = ts - previous_ts
+        rate = np.zeros_like(delta)
+        np.divide(delta, dt[:, None], out=rate, where=dt[:, None] > 0)
+
+        # Advance the state past the block
+        tail = np.arange(max(t0, t0 + n - size), t0 + n)
+        self._ring[tail % size] = sums[tail - t0]
+        self._total = sums[-1]
+        self._count = t0 + n
+        self._last = X[-1].copy()
+        self._last_time = float(ts[-1])
+        return np.stack(means + [delta, rate], axis=2).reshape(n, -1)
+
+
+def add_rolling_features(frame, timestamps):
+    """
+    Appends the rolling features of CONFIG['features']['columns'] to a
+    DataFrame of raw readings, computed in row order (the order the readings
+    were recorded in).
+    """
+    features = RollingFeatures()
+    values = features.transform(frame[features.columns].to_numpy(dtype=np.float64), timestamps)
+    frame = frame.copy()
+    for index, name in enumerate(features.names):
+        frame[name] = values[:, index]
+    return frame
+
+
+def derived_resolution(resolution):
+    """Prediction cache resolution of the rolling features: that of their source column."""
+    settings = CONFIG['features']
+    result = {}
+    for column in settings['columns']:
+        for name in feature_names([column], sorted(settings['windows'])):
+            result[name] = resolution[column]
+    return result
+
+
+def check_equivalence(values, timestamps, columns=None, windows=None, chunk_sizes=(1, 7, 1000)):
+    """
+    Max absolute difference between one-shot transform(), per-reading
+    update() and chunked transform() over the same stream (0.0 = identical).
+    """
+    reference = RollingFeatures(columns, windows).transform(values, timestamps)
+    ts = to_seconds(timestamps)
+    differences = {}
+
+    online = RollingFeatures(columns, windows)
+    rows = np.array([online.update(row, t) for row, t in zip(np.asarray(values, dtype=np.float64), ts)])
+    differences['update'] = float(np.nanmax(np.abs(rows - reference))) if len(rows) else 0.0
+
+    for chunk_size in chunk_sizes:
+        chunked = RollingFeatures(columns, windows)
+        blocks = [chunked.transform(values[i:i + chunk_size], ts[i:i + chunk_size])
+                  for i in range(0, len(ts), chunk_size)]
+        differences[f'transform/{chunk_size}'] = float(np.nanmax(np.abs(np.vstack(blocks) - reference)))
+    return differences
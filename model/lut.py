@@ -0,0 +1,294 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from model.config import CONFIG
+from model.registry import _file_signature, current_artifact_path
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('nearest', 'linear')
+
+
+class ProbabilityLUT:
+    """
+    Dense 3-D lookup table of the forest's class probabilities.
+
+    The grid spans the observed range of every feature in the training data
+    with shape[i] evenly spaced points per axis. Queries inside the grid are
+    answered in constant time by nearest-point lookup or trilinear
+    interpolation; queries outside it are reported so the caller can fall
+    back to the forest.
+
+    `accuracy` holds, per method, the label agreement with the forest and
+    the max |probability difference| measured when the table was built.
+    """
+
+    def __init__(self, probs, lows, highs, classes, columns, accuracy=None):
+        self.probs = probs
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.columns = list(columns)
+        self.shape = np.asarray(probs.shape[:-1])
+        self.accuracy = accuracy or {}
+        # A constant feature has a zero-width axis; every query on it lands on index 0
+        span = self.highs - self.lows
+        self.steps = np.where(span > 0, span / np.maximum(self.shape - 1, 1), 1.0)
+
+    @classmethod
+    def build(cls, scorer, lows, highs, shape, classes, columns):
+        """
+        Evaluates scorer (raw X -> probabilities) on every grid point.
+        """
+        axes = [np.linspace(low, high, n) for low, high, n in zip(lows, highs, shape)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(axes))
+        probs = scorer(grid).astype(np.float32).reshape(*shape, -1)
+        return cls(probs, lows, highs, classes, columns)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        target = os.path.join(path, 'probs.npy')
+        with open(target + '.tmp', 'wb') as f:
+            np.save(f, self.probs)
+        os.replace(target + '.tmp', target)
+
+        manifest = {
+            'lows': self.lows.tolist(),
+            'highs': self.highs.tolist(),
+            'shape': self.shape.tolist(),
+            'classes': self.classes_.tolist(),
+            'columns': self.columns,
+            'accuracy': self.accuracy,
+        }
+        target = os.path.join(path, 'manifest.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(target + '.tmp', target)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        probs = np.asarray(np.load(os.path.join(path, 'probs.npy'), mmap_mode=mmap_mode))
+        return cls(probs, manifest['lows'], manifest['highs'], manifest['classes'], manifest['columns'],
+                   manifest.get('accuracy'))
+
+    def inside(self, X):
+        return np.all((X >= self.lows) & (X <= self.highs), axis=1)
+
+    def predict_proba(self, X, method='linear'):
+        """
+        Probabilities for rows inside the grid (rows outside get NaN).
+        :param method: 'linear' (trilinear interpolation) or 'nearest'
+        :return: (probabilities, inside_mask)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        inside = self.inside(X)
+        probs = np.full((len(X), self.probs.shape[-1]), np.nan)
+        if not inside.any():
+            return probs, inside
+
+        position = (X[inside] - self.lows) / self.steps
+        if method == 'nearest':
+            index = np.clip(np.rint(position).astype(np.int64), 0, self.shape - 1)
+            probs[inside] = self.probs[tuple(index.T)]
+            return probs, inside
+        if method != 'linear':
+            raise ValueError(f"Unknown interpolation method: {method}")
+
+        # Lower corner of the enclosing cell and offsets within it
+        base = np.clip(np.floor(position).astype(np.int64), 0, self.shape - 2)
+        frac = position - base
+        result = np.zeros((len(base), self.probs.shape[-1]))
+        n_axes = len(self.shape)
+        for corner in range(1 << n_axes):
+            bits = np.array([(corner >> axis) & 1 for axis in range(n_axes)])
+            weight = np.prod(np.where(bits, frac, 1 - frac), axis=1)
+            result += weight[:, None] * self.probs[tuple((base + bits).T)]
+        probs[inside] = result
+        return probs, inside
+
+    def usable(self, method):
+        """True if the table agreed with the forest on at least CONFIG['lut']['min_agreement'] of the labels."""
+        measured = self.accuracy.get(method)
+        return measured is not None and measured['agreement'] >= CONFIG['lut']['min_agreement']
+
+
+def measure_accuracy(lut, forest, X):
+    """Label agreement and |probability difference| of the table against the forest on X, per method."""
+    exact = forest.predict_proba(X)
+    exact_labels = np.argmax(exact, axis=1)
+    result = {}
+    for method in METHODS:
+        probs, inside = lut.predict_proba(X, method=method)
+        probs[~inside] = exact[~inside]
+        error = np.abs(probs - exact).max(axis=1)
+        result[method] = {
+            'agreement': float((np.argmax(probs, axis=1) == exact_labels).mean()),
+            'mean_dp': float(error.mean()),
+            'p99_dp': float(np.percentile(error, 99)),
+            'max_dp': float(error.max()),
+        }
+    return result
+
+
+def build_lut(forest=None, shape=None, path=None):
+    """
+    Precomputes the forest's probabilities on a dense grid over the observed
+    feature ranges of the training data and saves the table, together with
+    its agreement with the forest on the training data.
+    :param forest: fused CompiledForest (default: the saved fused artifact)
+    :return: the ProbabilityLUT
+    """
+    from model.columnar import open_input_store
+    from model.compiled import load_compiled
+
+    if CONFIG['features']['enabled']:
+        raise ValueError("The lookup table covers the raw readings only; disable CONFIG['features'] to build it")
+    settings = CONFIG['lut']
+    shape = shape or settings['shape']
+    path = path or CONFIG['artifacts']['lut_path']
+    columns = CONFIG['data']['feature_columns']
+    if forest is None:
+        forest = load_compiled(fused=True)
+
+    data = open_input_store().matrix(columns)
+    lows = data.min(axis=0)
+    highs = data.max(axis=0)
+
+    lut = ProbabilityLUT.build(forest.predict_proba, lows, highs, shape, forest.classes_, columns)
+    lut.accuracy = measure_accuracy(lut, forest, data)
+    for method, measured in lut.accuracy.items():
+        log = logger.info if lut.usable(method) else logger.warning
+        log(f"LUT {method}: label agreement {measured['agreement'] * 100:.2f} %, "
+                    f"max |dp| {measured['max_dp']:.4f}"
+                    + ("" if lut.usable(method) else
+                       f" (below {CONFIG['lut']['min_agreement'] * 100:.0f} %, predict_lut uses the forest)"))
+    lut.save(path)
+    return lut
+
+
+_cache_lock = threading.Lock()
+_cache = {}
+
+
+def load_lut(path=None):
+    """
+    Returns the LUT of the current model version, memory-mapped and kept
+    resident until it changes. A missing working LUT is built; a published
+    version without one raises FileNotFoundError.
+    """
+    path = path or current_artifact_path('lut_path')
+    signature = _file_signature(os.path.join(path, 'manifest.json'))
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if signature is None:
+            if os.path.abspath(path) != os.path.abspath(CONFIG['artifacts']['lut_path']):
+                raise FileNotFoundError(f"Lookup table not found at {path}")
+            build_lut(path=path)
+            signature = _file_signature(os.path.join(path, 'manifest.json'))
+        lut = ProbabilityLUT.load(path)
+        _cache[path] = (signature, lut)
+        for stale in [cached_path for cached_path in _cache if not os.path.exists(cached_path)]:
+            del _cache[stale]
+        return lut
+
+
+def predict_lut(samples, method='linear'):
+    """
+    Scores raw samples from the lookup table; rows outside the grid fall back
+    to the fused forest. If the table's measured label agreement with the
+    forest is below CONFIG['lut']['min_agreement'] (or was never measured),
+    every row is scored with the forest.
+    :return: (labels, probabilities)
+    """
+    from model.compiled import load_compiled
+    from model.predict import _label_counts, _stats, _to_feature_matrix
+
+    start = time.perf_counter()
+    lut = load_lut()
+    X = _to_feature_matrix(samples)
+    if lut.usable(method):
+        probs, inside = lut.predict_proba(X, method=method)
+        if not inside.all():
+            probs[~inside] = load_compiled(fused=True).predict_proba(X[~inside])
+    else:
+        _warn_unusable(lut, method)
+        probs = load_compiled(fused=True).predict_proba(X)
+    labels = lut.classes_[np.argmax(probs, axis=1)]
+
+    _stats.record('predict_lut', time.perf_counter() - start, _label_counts(labels))
+    return labels, probs
+
+
+def _warn_unusable(lut, method):
+    warned = lut.__dict__.setdefault('_warned', set())
+    if method not in warned:
+        warned.add(method)
+        measured = lut.accuracy.get(method)
+        agreement = f"{measured['agreement'] * 100:.2f} %" if measured else "not measured"
+        logger.warning(f"LUT {method} label agreement with the forest is {agreement} "
+                       f"(min {CONFIG['lut']['min_agreement'] * 100:.0f} %); scoring with the forest")
+
+
+def error_report(n_random=100000, seed=0, path=None):
+    """
+    Compares LUT predictions with the exact (fused) forest and prints the errors.
+    :param path: LUT to check (default: that of the current model version)
+    """
+    from model.columnar import open_input_store
+    from model.compiled import load_compiled
+
+    columns = CONFIG['data']['feature_columns']
+    lut = load_lut(path)
+    forest = load_compiled(fused=True)
+    data = open_input_store().matrix(columns)
+    random = np.random.RandomState(seed).uniform(lut.lows, lut.highs, (n_random, len(columns)))
+
+    print(f"LUT grid {tuple(lut.shape.tolist())}, {lut.probs.nbytes / 1e6:.1f} MB")
+    for name, X in (("training data", data), ("random in envelope", random)):
+        for method, measured in measure_accuracy(lut, forest, X).items():
+            print(f"  {name:<20} {method:<8} label agreement {measured['agreement'] * 100:6.2f} %   "
+                  f"|dp| mean {measured['mean_dp']:.4f}  p99 {measured['p99_dp']:.4f}  "
+                  f"max {measured['max_dp']:.4f}"
+                  + ("" if name != "training data" or lut.usable(method) else "   (forest fallback)"))
+
+    if path is not None:
+        return
+
+    row = data[:1]
+    for label, func in (("LUT linear, 1 row", lambda: predict_lut(row)),
+                        ("LUT nearest, 1 row", lambda: predict_lut(row, method='nearest')),
+                        ("fused forest, 1 row", lambda: forest.predict_proba(row))):
+        times = []
+        for _ in range(50):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        print(f"  {label:<20} median {np.median(times) * 1e6:9.1f} us")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or check the probability lookup table')
+    parser.add_argument('action', choices=['build', 'report'])
+    parser.add_argument('--shape', type=int, nargs=3, default=None, help='Grid points per axis (temp pressure flow)')
+    parser.add_argument('--rows', type=int, default=100000, help='Random rows for the error report')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.action == 'build':
+        start = time.perf_counter()
+        lut = build_lut(shape=args.shape)
+        print(f"Built LUT {tuple(lut.shape.tolist())} in {time.perf_counter() - start:.1f} s")
+        # The table just built (served once train() publishes it with a model version)
+        error_report(n_random=args.rows, path=CONFIG['artifacts']['lut_path'])
+    else:
+        error_report(n_random=args.rows)
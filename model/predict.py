@@ -1,40 +1,361 @@
-import pandas as pd
-import joblib
+import logging
+import queue
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
 from model.config import CONFIG
+from model.cache import QuantizedLRUCache
+from model.features import RollingFeatures, derived_resolution, model_columns
+from model.registry import get_artifacts, get_registry, get_registry_stats
+from model.stats import InferenceStats
+
+logger = logging.getLogger(__name__)
+
+_stats = InferenceStats()
+_cache = None
 
 
 def load_artifacts():
-    model = joblib.load(CONFIG['artifacts']['model_path'])
-    scaler = joblib.load(CONFIG['artifacts']['scaler_path'])
-    return model, scaler
+    """
+    Returns the resident model and scaler from the shared registry.
+    Artifacts are read from disk only on first use or after they change.
+    """
+    return get_artifacts()
+
+
+def _reading_time(sample):
+    """
+    Seconds of the reading's timestamp column: seconds, a datetime or a string
+    in the CONFIG['data']['date_columns'] format. The rates of change are per
+    second of this clock, so readings without it are rejected rather than
+    timestamped on arrival.
+    """
+    column = CONFIG['features']['timestamp_column']
+    value = sample.get(column) if isinstance(sample, Mapping) else None
+    if value is None:
+        raise ValueError(f"Rolling features need the time of every reading in '{column}'")
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    import pandas as pd
+    date_format = CONFIG['data']['date_columns'].get(column) if isinstance(value, str) else None
+    # Same conversion as model.features.to_seconds for the training CSV
+    return pd.to_datetime(value, format=date_format).value / 1e9
 
 
-def predict(sample: dict):
+def predict(sample: dict, features=None):
     """
     Makes prediction for a single sample
     sample = {'temp': float, 'pressure': float, 'flow': float}
+
+    With CONFIG['features'] enabled, pass the RollingFeatures of the stream
+    the sample belongs to (one per sensor source, owned by the caller); the
+    sample is then its next raw reading and must carry its timestamp.
+    Without it the sample must already carry every model_columns() value.
     """
-    model, scaler = load_artifacts()
+    import pandas as pd
+
+    start = time.perf_counter()
+    if features is not None and CONFIG['features']['enabled']:
+        sample = features.update_sample(sample, _reading_time(sample))
+    missing = [c for c in model_columns() if c not in sample]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
 
+    model, scaler, version = get_registry().get_versioned()
+    columns = model_columns()
 
-    sample_df = pd.DataFrame([sample], columns=['temp', 'pressure', 'flow'])
+    cache = _cache
+    if cache is not None:
+        key = cache.key(sample)
+        prediction = cache.get(key, version)
+        if prediction is not None:
+            _stats.record('predict', time.perf_counter() - start, {prediction: 1})
+            return prediction
+        # Predict on the bucket center so the cached result does not depend on
+        # which reading happened to fill the entry
+        sample = cache.quantized_sample(key)
 
+    sample_df = pd.DataFrame([sample], columns=columns)
 
     X_scaled = pd.DataFrame(
         scaler.transform(sample_df),
-        columns=['temp', 'pressure', 'flow']
+        columns=columns
     )
 
-    # Debug
-    print(f"Scaled input: {X_scaled.values}")
-    
-    # prediction probability
-    if hasattr(model, 'predict_proba'):
-        probs = model.predict_proba(X_scaled)
-        print(f"Prediction probabilities: {probs}")
-    
-    # Make prediction
-    prediction = model.predict(X_scaled)[0]
-    print(f"Model prediction: {prediction}")
-    
+    # One forest pass: the predicted class is the argmax of the probabilities
+    probs = model.predict_proba(X_scaled)
+    prediction = model.classes_[np.argmax(probs[0])]
+
+    if cache is not None:
+        cache.put(key, prediction, version)
+    _stats.record('predict', time.perf_counter() - start, {prediction: 1})
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Scaled input: {X_scaled.values}")
+        logger.debug(f"Prediction probabilities: {probs}")
+        logger.debug(f"Model prediction: {prediction}")
+
     return prediction
+
+
+def get_inference_stats():
+    """
+    Returns call counts, rows, predicted label distribution and latency
+    histogram summaries (microseconds) per API, plus model registry counters.
+    """
+    stats = _stats.snapshot()
+    stats['registry'] = get_registry_stats()
+    return stats
+
+
+def reset_inference_stats():
+    _stats.reset()
+
+
+def enable_prediction_cache(max_entries=None, resolution=None):
+    """
+    Puts a bounded LRU cache in front of predict().
+    Inputs are quantized to `resolution` (per feature, defaults from
+    CONFIG['cache']['resolution']) and predictions are made on the quantized
+    values. The cache is cleared automatically when the model artifacts change.
+    """
+    global _cache
+    settings = CONFIG['cache']
+    resolution = dict(settings['resolution'], **(resolution or {}))
+    if CONFIG['features']['enabled']:
+        resolution = dict(derived_resolution(resolution), **resolution)
+    _cache = QuantizedLRUCache(
+        model_columns(),
+        resolution,
+        max_entries=max_entries or settings['max_entries'],
+    )
+    return _cache
+
+
+def disable_prediction_cache():
+    global _cache
+    _cache = None
+
+
+def get_cache_stats():
+    """Returns hit-rate and size statistics of the predict() cache, or None if disabled."""
+    cache = _cache
+    return cache.stats() if cache is not None else None
+
+
+if CONFIG['cache']['enabled']:
+    enable_prediction_cache()
+
+
+def _to_feature_matrix(samples, columns=None):
+    """
+    Converts samples to a float (n, n_features) array in the order of
+    columns (default: model_columns(), i.e. the raw feature columns, plus
+    the rolling features if enabled).
+    Accepts a NumPy array, a DataFrame or an iterable of dicts/sequences.
+    """
+    columns = columns or model_columns()
+
+    # A DataFrame can only be passed in if pandas has already been imported
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(samples, pd.DataFrame):
+        missing = [c for c in columns if c not in samples.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        return samples[columns].to_numpy(dtype=np.float64)
+
+    if isinstance(samples, np.ndarray):
+        X = np.asarray(samples, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != len(columns):
+            raise ValueError(f"Expected array of shape (n, {len(columns)}), got {samples.shape}")
+        return X
+
+    def values(row):
+        if not isinstance(row, Mapping):
+            return list(row)
+        try:
+            return [row[c] for c in columns]
+        except KeyError:
+            raise ValueError(f"Missing feature columns: {[c for c in columns if c not in row]}") from None
+
+    rows = [values(row) for row in samples]
+    if not rows:
+        return np.empty((0, len(columns)))
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(columns):
+        raise ValueError(f"Expected rows of {len(columns)} values ({', '.join(columns)})")
+    return X
+
+
+def _stream_matrix(features, samples, timestamps):
+    """
+    Model input of raw readings that continue a stream: the feature columns
+    plus the rolling features, advancing the state of `features`.
+    """
+    raw_columns = CONFIG['data']['feature_columns']
+    X = _to_feature_matrix(samples, raw_columns)
+    if all(c in raw_columns for c in features.columns):
+        source = X[:, [raw_columns.index(c) for c in features.columns]]
+    else:
+        source = _to_feature_matrix(samples, features.columns)
+    return np.hstack([X, features.transform(source, timestamps)])
+
+
+def _model_matrix(samples, features=None):
+    """
+    Model input of samples: with CONFIG['features'] enabled and a stream's
+    RollingFeatures, raw timestamped readings that continue that stream;
+    otherwise rows that already carry every model_columns() value.
+    """
+    if features is None or not CONFIG['features']['enabled']:
+        return _to_feature_matrix(samples)
+    samples = list(samples)
+    return _stream_matrix(features, samples, [_reading_time(sample) for sample in samples])
+
+
+def _label_counts(labels):
+    values, counts = np.unique(labels, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def predict_batch(samples, return_classes=False):
+    """
+    Makes predictions for many samples in one vectorized pass.
+    samples - NumPy array (n, 3), DataFrame or iterable of
+              {'temp': float, 'pressure': float, 'flow': float}
+
+    The rows are scored independently, so with CONFIG['features'] enabled
+    they must already carry every model_columns() value; raw readings of a
+    stream go through predict(features=...) or predict_stream() instead.
+
+    :return: (labels, probabilities) - labels as an array of class names,
+             probabilities as an (n, n_classes) array ordered like model.classes_;
+             with return_classes also the classes of the model that scored them
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    model, scaler = load_artifacts()
+    columns = model_columns()
+
+    X = _to_feature_matrix(samples)
+    if len(X) == 0:
+        labels, probs = np.empty(0, dtype=model.classes_.dtype), np.empty((0, len(model.classes_)))
+        return (labels, probs, model.classes_) if return_classes else (labels, probs)
+
+    # StandardScaler.transform without the per-call validation overhead
+    X_scaled = (X - scaler.mean_) / scaler.scale_
+
+    probs = model.predict_proba(pd.DataFrame(X_scaled, columns=columns))
+    labels = model.classes_[np.argmax(probs, axis=1)]
+
+    _stats.record('predict_batch', time.perf_counter() - start, _label_counts(labels))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Scored batch of {len(X)} rows")
+    if return_classes:
+        return labels, probs, model.classes_
+    return labels, probs
+
+
+_STREAM_END = object()
+
+
+def predict_stream(samples, batch_size=256, max_wait=0.05, max_pending=None, features=None):
+    """
+    Scores an (possibly unbounded) stream of samples in micro-batches.
+
+    Samples are read by a background thread into a bounded queue and
+    grouped into batches of at most batch_size, waiting at most max_wait
+    seconds after the first sample of a batch. When the consumer is slower
+    than the source, the queue fills up and the reader blocks, so memory
+    stays bounded by max_pending + batch_size samples.
+
+    With CONFIG['features'] enabled the samples are raw readings of one
+    stream, dicts carrying their timestamp column; their rolling features
+    are computed in order.
+
+    :param samples: iterable of dicts or (temp, pressure, flow) sequences
+    :param batch_size: max samples per model call
+    :param max_wait: max seconds to wait for a batch to fill
+    :param max_pending: queue capacity (default: 4 * batch_size)
+    :param features: RollingFeatures the stream continues (default: a new one)
+    :return: generator of (sample, label, probability) in input order,
+             probability being the probability of the predicted label
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if max_pending is None:
+        max_pending = 4 * batch_size
+
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    if not CONFIG['features']['enabled']:
+        features = None
+    elif features is None:
+        features = RollingFeatures()
+
+    def put(item):
+        # Timeout lets the reader notice that the consumer has gone away
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for sample in samples:
+                timestamp = _reading_time(sample) if features is not None else None
+                if not put((sample, timestamp, None)):
+                    return
+            put((_STREAM_END, None, None))
+        except Exception as e:
+            put((_STREAM_END, None, e))
+
+    threading.Thread(target=reader, name='predict-stream-reader', daemon=True).start()
+
+    try:
+        finished = False
+        error = None
+        while not finished:
+            sample, timestamp, error = pending.get()
+            if sample is _STREAM_END:
+                break
+
+            batch = [sample]
+            timestamps = [timestamp]
+            deadline = time.monotonic() + max_wait
+            while len(batch) < batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    sample, timestamp, error = pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if sample is _STREAM_END:
+                    finished = True
+                    break
+                batch.append(sample)
+                timestamps.append(timestamp)
+
+            if features is None:
+                labels, probs = predict_batch(batch)
+            else:
+                labels, probs = predict_batch(_stream_matrix(features, batch, timestamps))
+            confidence = probs.max(axis=1)
+            for item, label, probability in zip(batch, labels, confidence):
+                yield item, label, float(probability)
+
+        if error is not None:
+            raise error
+    finally:
+        stop.set()
@@ -0,0 +1,423 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from model.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _file_signature(path):
+    """Returns a cheap (mtime_ns, size) signature, or None if the file is missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    """
+    Hard-links src to dst, or copies it where links are not supported.
+    Artifacts are only ever replaced (written under a temporary name and
+    renamed), never modified in place, so linked copies cannot change under
+    each other.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+# Artifacts of one train() run that are published together as a version
+_VERSIONED_ARTIFACTS = ('model_path', 'scaler_path', 'compiled_path', 'fused_path', 'lut_path',
+                        'test_set_path', 'metrics_path', 'feature_importance_path', 'history_path')
+
+_pointer_lock = threading.Lock()
+_pointer = {'signature': None, 'version': None}
+
+
+def _version_dir(version):
+    return os.path.join(CONFIG['artifacts']['versions_path'], version)
+
+
+def current_version():
+    """
+    Id of the published version the current pointer names, or None if no
+    version has been published yet. The pointer file is only re-read when
+    it has been replaced.
+    """
+    path = CONFIG['artifacts']['current_path']
+    try:
+        st = os.stat(path)
+        signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        signature = None
+
+    with _pointer_lock:
+        if signature == _pointer['signature']:
+            return _pointer['version']
+        version = None
+        if signature is not None:
+            with open(path) as f:
+                version = json.load(f)['version']
+        _pointer['signature'], _pointer['version'] = signature, version
+        return version
+
+
+def artifact_path(key, version=None):
+    """
+    Path of an artifact (a CONFIG['artifacts'] key such as 'model_path') in
+    the given published version, or the working path train() writes to if
+    version is None.
+    """
+    path = CONFIG['artifacts'][key]
+    if version is None:
+        return path
+    return os.path.join(_version_dir(version), os.path.basename(path))
+
+
+def current_artifact_path(key):
+    """Path of an artifact in the current version (the working path before the first publish)."""
+    return artifact_path(key, current_version())
+
+
+def read_manifest(version):
+    with open(os.path.join(_version_dir(version), 'manifest.json')) as f:
+        return json.load(f)
+
+
+def list_versions():
+    """[(version, manifest)] of the complete published versions, newest first."""
+    root = CONFIG['artifacts']['versions_path']
+    versions = []
+    for name in os.listdir(root):
+        if name.endswith('.tmp'):
+            continue
+        try:
+            versions.append((name, read_manifest(name)))
+        except (FileNotFoundError, ValueError):
+            continue
+    versions.sort(key=lambda item: item[1]['created'], reverse=True)
+    return versions
+
+
+def activate_version(version):
+    """Makes a published version current by atomically replacing the pointer file."""
+    read_manifest(version)
+    path = CONFIG['artifacts']['current_path']
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': version, 'activated': time.time()}, f, indent=4)
+    os.replace(path + '.tmp', path)
+    logger.info(f"Model version {version} is now current")
+
+
+def publish_version(fingerprint=None):
+    """
+    Snapshots the working artifacts written by train() into a new version
+    directory (hard links where possible) and makes it current. Readers load every artifact of a
+    version from that one immutable directory, so they never see a torn or
+    mismatched model/scaler pair. A version with identical model and scaler
+    contents is re-activated instead of copied again.
+
+    :param fingerprint: training fingerprint recorded in the manifest
+    :return: the version id
+    """
+    artifacts = CONFIG['artifacts']
+    hashes = {key: _file_hash(artifacts[key]) for key in ('model_path', 'scaler_path')}
+
+    for version, manifest in list_versions():
+        if manifest['sha256'] == hashes:
+            if current_version() != version:
+                activate_version(version)
+            return version
+
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{hashes['model_path'][:8]}"
+    target = _version_dir(version)
+    tmp_target = target + '.tmp'
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    os.makedirs(tmp_target)
+
+    files = []
+    for key in _VERSIONED_ARTIFACTS:
+        src = artifacts[key]
+        dst = os.path.join(tmp_target, os.path.basename(src))
+        if os.path.isdir(src):
+            shutil.copytree(src, dst, copy_function=_link_or_copy)
+        elif os.path.exists(src):
+            _link_or_copy(src, dst)
+        else:
+            continue
+        files.append(os.path.basename(src))
+
+    manifest = {'version': version, 'created': time.time(), 'fingerprint': fingerprint,
+                'sha256': hashes, 'files': files}
+    with open(os.path.join(tmp_target, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    # The directory only appears under its final name once it is complete
+    os.replace(tmp_target, target)
+    activate_version(version)
+    _prune_versions()
+    return version
+
+
+def _prune_versions():
+    """Keeps the current version and the newest CONFIG['registry']['keep_versions'] others."""
+    current = current_version()
+    others = [version for version, _ in list_versions() if version != current]
+    for version in others[CONFIG['registry']['keep_versions']:]:
+        logger.info(f"Removing old model version {version}")
+        # Processes that still map files of this version keep them until they swap
+        shutil.rmtree(_version_dir(version), ignore_errors=True)
+
+
+class ModelRegistry:
+    """
+    Keeps the model and scaler resident in the process.
+
+    Artifacts are loaded once and the same objects are handed out to every
+    caller. By default the registry follows the current published version
+    (falling back to the working artifacts before the first publish); with
+    explicit paths it is pinned to those files. Each get() does a cheap
+    stat(); only when the version or the files changed are the contents
+    hashed, and the artifacts are reloaded only if the hash differs from the
+    loaded one.
+
+    A new version is loaded without holding the lock that get() uses, and
+    while it loads other callers keep getting the previous pair. Callers
+    that already hold a (model, scaler) pair finish with it.
+    """
+
+    def __init__(self, model_path=None, scaler_path=None):
+        self._pinned = model_path is not None or scaler_path is not None
+        self.model_path = model_path or CONFIG['artifacts']['model_path']
+        self.scaler_path = scaler_path or CONFIG['artifacts']['scaler_path']
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loading = False
+        self._model = None
+        self._scaler = None
+        self._signatures = None
+        self._hashes = None
+        self._listeners = []
+        self.version_id = None
+
+        # Counters
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.last_load_time = 0.0
+        self.total_load_time = 0.0
+
+    def _resolve(self):
+        """(version id, (model path, scaler path), signatures) of the artifacts to serve."""
+        if self._pinned:
+            version, paths = None, (self.model_path, self.scaler_path)
+        else:
+            version = current_version()
+            paths = (artifact_path('model_path', version), artifact_path('scaler_path', version))
+        signatures = (version,) + tuple(_file_signature(path) for path in paths)
+        return version, paths, signatures
+
+    def _check_exists(self, paths, signatures):
+        for path, signature in zip(paths, signatures[1:]):
+            if signature is None:
+                raise FileNotFoundError(f"Artifact file not found at {path}")
+
+    def _load(self, version, paths, signatures):
+        import joblib
+
+        start = time.perf_counter()
+        hashes = tuple(_file_hash(path) for path in paths)
+
+        if self._model is not None and hashes == self._hashes:
+            # Files were touched, rewritten or republished with identical contents
+            with self._lock:
+                self._signatures = signatures
+                self.version_id = version
+            return False
+
+        model = joblib.load(paths[0])
+        scaler = joblib.load(paths[1])
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if self._model is not None:
+                self.reloads += 1
+            self._model, self._scaler = model, scaler
+            self._signatures = signatures
+            self._hashes = hashes
+            self.version_id = version
+            self.version += 1
+            self.last_load_time = elapsed
+            self.total_load_time += elapsed
+        if version is not None:
+            logger.info(f"Loaded model version {version} in {elapsed:.2f} s")
+        return True
+
+    def add_listener(self, callback):
+        """Calls callback(version_id) after every swap to newly loaded artifacts (not the first load)."""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """
+        Loads the current artifacts if they changed since the last load.
+        :return: True if a new model/scaler pair was swapped in
+        """
+        version, paths, signatures = self._resolve()
+        with self._load_lock:
+            with self._lock:
+                if self._model is not None and signatures == self._signatures:
+                    return False
+                first_load = self._model is None
+                self._loading = True
+                self.misses += 1
+            try:
+                self._check_exists(paths, signatures)
+                changed = self._load(version, paths, signatures)
+            finally:
+                with self._lock:
+                    self._loading = False
+
+        if changed and not first_load:
+            for callback in list(self._listeners):
+                try:
+                    callback(version)
+                except Exception as e:
+                    logger.error(f"Model change listener failed: {e}")
+        return changed
+
+    def get(self):
+        """Returns the resident (model, scaler) pair, loading it if needed."""
+        model, scaler, _ = self.get_versioned()
+        return model, scaler
+
+    def get_versioned(self):
+        """Returns (model, scaler, version); version changes whenever new artifacts are loaded."""
+        model, scaler, version, _ = self.snapshot()
+        return model, scaler, version
+
+    def snapshot(self):
+        """
+        Returns (model, scaler, version, version_id), where version_id names
+        the published version the pair was loaded from (None for the working
+        artifacts), e.g. to read the matching compiled forest.
+        """
+        _, _, signatures = self._resolve()
+        with self._lock:
+            if self._model is not None and (signatures == self._signatures or self._loading):
+                self.hits += 1
+                return self._model, self._scaler, self.version, self.version_id
+
+        self.refresh()
+        with self._lock:
+            return self._model, self._scaler, self.version, self.version_id
+
+    def invalidate(self):
+        """Drops the resident artifacts so the next get() loads them again."""
+        with self._lock:
+            self._model = None
+            self._scaler = None
+            self._signatures = None
+            self._hashes = None
+            self.version_id = None
+
+    def stats(self):
+        """Returns load-time and hit/miss counters."""
+        with self._lock:
+            return {
+                'version': self.version,
+                'version_id': self.version_id,
+                'loaded': self._model is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'reloads': self.reloads,
+                'last_load_time': self.last_load_time,
+                'total_load_time': self.total_load_time,
+            }
+
+
+class ModelWatcher:
+    """
+    Watches the current-version pointer from a background thread and swaps
+    new versions into the registry as soon as they are published, so the
+    GUI and servers pick up a retrained model without a restart and no
+    request waits for the load.
+    """
+
+    def __init__(self, registry, interval=None):
+        self.registry = registry
+        self.interval = interval or CONFIG['registry']['watch_interval']
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # The first load happens on first use; the watcher only swaps in newer versions
+            if current_version() is None or not self.registry.stats()['loaded']:
+                continue
+            try:
+                self.registry.refresh()
+            except Exception as e:
+                # E.g. a version removed while it was being loaded; retried on the next tick
+                logger.warning(f"Could not load the current model version: {e}")
+
+
+_registry = ModelRegistry()
+_watcher = None
+
+
+def get_registry():
+    """Returns the process-wide registry shared by all callers."""
+    return _registry
+
+
+def get_artifacts():
+    """Returns the shared (model, scaler) pair."""
+    return _registry.get()
+
+
+def get_registry_stats():
+    return _registry.stats()
+
+
+def start_watcher(on_change=None, interval=None):
+    """
+    Starts (once per process) the watcher that hot-swaps new model versions
+    into the shared registry.
+    :param on_change: optional callback(version_id) after each swap, e.g. to
+                      warm up the compiled forest of the new version
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = ModelWatcher(_registry, interval)
+    if on_change is not None:
+        _registry.add_listener(on_change)
+    return _watcher.start()
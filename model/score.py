@@ -0,0 +1,140 @@
+import argparse
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from model.config import CONFIG
+from model.registry import current_artifact_path
+
+logger = logging.getLogger(__name__)
+
+_forest = None
+
+
+def _init_worker(fused_path):
+    """Maps the fused forest once per worker; the pages are shared through the page cache."""
+    global _forest
+    from model.compiled import load_compiled
+    _forest = load_compiled(fused_path, fused=True)
+
+
+def _score_chunk(X):
+    probs = _forest.predict_proba(X)
+    best = np.argmax(probs, axis=1)
+    return best, probs[np.arange(len(best)), best]
+
+
+def score_file(input_path, output_path, chunk_size=100000, processes=None, progress_every=5.0):
+    """
+    Scores a sensor CSV out of core and writes it back with 'prediction' and
+    'probability' columns, in input order. With CONFIG['features'] enabled
+    the rolling features are computed here, in file order, carrying their
+    state from chunk to chunk.
+
+    The file is read in chunks of chunk_size rows and the chunks are scored
+    by a pool of worker processes, each memory-mapping the same fused forest.
+    At most two chunks per worker are in flight, so memory stays bounded
+    whatever the file size.
+    :param processes: worker processes (default: all cores; 1 scores in-process)
+    :return: summary with rows, chunks, seconds and rows_per_s
+    """
+    import pandas as pd
+    from model.compiled import load_compiled
+    from model.features import RollingFeatures
+
+    columns = CONFIG['data']['feature_columns']
+    settings = CONFIG['features']
+    features = RollingFeatures() if settings['enabled'] else None
+    timestamp_format = CONFIG['data']['date_columns'].get(settings['timestamp_column'])
+    # Resolved once, so every worker maps the same model version
+    fused_path = current_artifact_path('fused_path')
+    processes = processes or os.cpu_count() or 1
+
+    # Export the fused forest up front so workers only ever map it
+    classes = load_compiled(fused_path, fused=True).classes_
+    total_bytes = os.path.getsize(input_path)
+    tmp_path = output_path + '.tmp'
+
+    start = time.perf_counter()
+    last_report = start
+    rows = 0
+    chunks = 0
+
+    if processes == 1:
+        _init_worker(fused_path)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(fused_path,))
+
+    try:
+        with open(input_path, 'rb') as src, open(tmp_path, 'w', newline='') as dst:
+            reader = pd.read_csv(src, chunksize=chunk_size)
+            pending = deque()
+
+            def write_next():
+                nonlocal rows, chunks, last_report
+                chunk, result = pending.popleft()
+                best, probability = result.result() if executor else result
+                chunk['prediction'] = classes[best]
+                chunk['probability'] = probability
+                chunk.to_csv(dst, header=chunks == 0, index=False)
+                rows += len(chunk)
+                chunks += 1
+
+                now = time.perf_counter()
+                if now - last_report >= progress_every:
+                    last_report = now
+                    done = min(src.tell() / total_bytes, 1.0) if total_bytes else 1.0
+                    logger.info(f"Scored {rows} rows ({done * 100:.1f} %), "
+                                f"{rows / (now - start):.0f} rows/s")
+
+            for chunk in reader:
+                missing = [c for c in columns if c not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Missing feature columns in {input_path}: {missing}")
+                X = chunk[columns].to_numpy(dtype=np.float64)
+                if features is not None:
+                    timestamps = pd.to_datetime(chunk[settings['timestamp_column']], format=timestamp_format)
+                    derived = features.transform(chunk[features.columns].to_numpy(dtype=np.float64),
+                                                 timestamps.to_numpy())
+                    X = np.hstack([X, derived])
+                result = executor.submit(_score_chunk, X) if executor else _score_chunk(X)
+                pending.append((chunk, result))
+                while len(pending) >= 2 * processes:
+                    write_next()
+            while pending:
+                write_next()
+        os.replace(tmp_path, output_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'rows': rows,
+        'chunks': chunks,
+        'processes': processes,
+        'seconds': elapsed,
+        'rows_per_s': rows / elapsed if elapsed else 0.0,
+        'mb_per_s': total_bytes / 1e6 / elapsed if elapsed else 0.0,
+    }
+    logger.info(f"Scored {rows} rows in {elapsed:.2f} s with {processes} process(es): "
+                f"{summary['rows_per_s']:.0f} rows/s, {summary['mb_per_s']:.1f} MB/s")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a sensor CSV file with the trained model')
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='Rows per chunk')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    score_file(args.input_path, args.output_path, chunk_size=args.chunk_size, processes=args.processes)
@@ -0,0 +1,118 @@
+import threading
+from collections import Counter
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram with microsecond resolution.
+
+    Values below 2 ** (sub_bucket_bits + 1) us get their own bucket; above
+    that every power of two is split into 2 ** sub_bucket_bits buckets, so
+    the relative error stays below 1 / 2 ** sub_bucket_bits (< 1 % with the
+    default 7 bits) at fixed memory, whatever the range.
+    """
+
+    def __init__(self, sub_bucket_bits=7, max_value_us=60_000_000):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_value_us = max_value_us
+        self.counts = [0] * (self._index(max_value_us) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits - 1)
+        return (shift << self.sub_bucket_bits) + (value >> shift)
+
+    def _bucket_bounds(self, index):
+        if index < (2 << self.sub_bucket_bits):
+            return index, index + 1
+        shift = (index >> self.sub_bucket_bits) - 1
+        mantissa = index - (shift << self.sub_bucket_bits)
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def record(self, seconds):
+        value = min(max(int(seconds * 1e6), 0), self.max_value_us)
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_us += value
+            self.max_us = max(self.max_us, value)
+            self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def percentile(self, q):
+        """Latency in microseconds below which q percent of the calls fall."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, -(-self.count * q // 100))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= target:
+                    low, high = self._bucket_bounds(index)
+                    return float(min((low + high - 1) / 2, self.max_us))
+            return float(self.max_us)
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    def summary(self):
+        """Count, mean, min/max and common percentiles, in microseconds."""
+        summary = {
+            'count': self.count,
+            'mean_us': self.total_us / self.count if self.count else 0.0,
+            'min_us': self.min_us or 0,
+            'max_us': self.max_us,
+        }
+        for q in (50, 90, 99, 99.9):
+            summary[f'p{q:g}_us'] = self.percentile(q)
+        return summary
+
+
+class InferenceStats:
+    """Per-API call counters, row counts, latency histograms and label distribution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.calls = Counter()
+        self.rows = Counter()
+        self.labels = Counter()
+
+    def record(self, api, seconds, label_counts):
+        """Records one call of `api`; label_counts maps predicted label -> number of rows."""
+        with self._lock:
+            histogram = self.histograms.get(api)
+            if histogram is None:
+                histogram = self.histograms[api] = LatencyHistogram()
+            self.calls[api] += 1
+            self.rows[api] += sum(label_counts.values())
+            self.labels.update(label_counts)
+        histogram.record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.calls.clear()
+            self.rows.clear()
+            self.labels.clear()
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self.histograms)
+            result = {
+                'calls': dict(self.calls),
+                'rows': dict(self.rows),
+                'labels': {str(label): n for label, n in self.labels.items()},
+            }
+        result['latency'] = {api: histogram.summary() for api, histogram in histograms.items()}
+        return result
@@ -1,15 +1,21 @@
-import pandas as pd
 import os
 import logging
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+import shutil
+import time
 
-import joblib
-from model.config import CONFIG
+from model.config import CONFIG, get_model_class
+from model.compiled import CompiledForest, export_compiled, export_fused
+from model.lut import build_lut
+from model import dataset_cache, training_cache
+from model.columnar import ColumnStore, open_input_store
+from model.features import add_rolling_features
+from model.evaluate import compute_metrics
+from model.registry import publish_version
+from model.utils import save_metrics, save_feature_importance
 import numpy as np
 
-from imblearn.over_sampling import SMOTE
+# pandas, sklearn un imblearn tiek importēti funkcijās, lai modeļa pakotnes
+# imports (GUI, serveris) nemaksātu to ielādes laiku
 
 def setup_logging():
     log_dir = CONFIG['logging']['log_path']
@@ -25,16 +31,113 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
+# Neatkarīgi pārparaugotāji, kurus prepare_data palaiž paralēli
+_OVERSAMPLERS = ('smote', 'adasyn', 'borderline_smote')
+
+
+def _run_oversampler(name, random_state, X_path, y_path):
+    """
+    Runs one oversampler on the shared scaled matrix (memory-mapped .npy).
+    :return: (new rows, their class codes, seconds)
+    """
+    from imblearn.over_sampling import SMOTE, ADASYN, BorderlineSMOTE
+
+    sampler_class = {'smote': SMOTE, 'adasyn': ADASYN, 'borderline_smote': BorderlineSMOTE}[name]
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path)
+
+    start = time.perf_counter()
+    X_res, y_res = sampler_class(random_state=random_state).fit_resample(X, y)
+    elapsed = time.perf_counter() - start
+
+    # The original rows come first; only the synthetic ones are sent back
+    n = len(X)
+    if len(X_res) >= n and np.array_equal(X_res[:n], X) and np.array_equal(y_res[:n], y):
+        X_res, y_res = X_res[n:], y_res[n:]
+    return X_res, y_res, elapsed
+
+
+def _oversample_combined(X, y, target_samples, logger):
+    """
+    SMOTE, ADASYN un BorderlineSMOTE uz vienas un tās pašas mērogotās matricas,
+    apvienoti bez dublikātiem un ierobežoti līdz target_samples.
+
+    The oversamplers run concurrently in a process pool
+    (CONFIG['oversampling_pool']['processes'], 1 = in this process, default
+    one per core); the
+    input is written once to a temporary .npy that every worker memory-maps.
+    :return: (X_balanced, y_balanced) as arrays
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    settings = CONFIG['oversampling']
+    processes = min(CONFIG['oversampling_pool']['processes'] or os.cpu_count() or 1, len(_OVERSAMPLERS))
+    classes, codes = np.unique(y, return_inverse=True)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='oversampling-') as tmp:
+        X_path, y_path = os.path.join(tmp, 'X.npy'), os.path.join(tmp, 'y.npy')
+        np.save(X_path, np.ascontiguousarray(X, dtype=np.float64))
+        np.save(y_path, codes)
+
+        jobs = [(name, settings[f'{name}_random_state'], X_path, y_path) for name in _OVERSAMPLERS]
+        if processes > 1:
+            with ProcessPoolExecutor(processes) as pool:
+                futures = [pool.submit(_run_oversampler, *job) for job in jobs]
+                results = [future.result() for future in futures]
+        else:
+            results = [_run_oversampler(*job) for job in jobs]
+    oversampling_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_balanced, y_codes = _combine_oversampled(X, codes, results, target_samples)
+    combine_time = time.perf_counter() - start
+
+    sampler_times = ', '.join(f"{name} {seconds:.2f} s" for name, (_, _, seconds) in zip(_OVERSAMPLERS, results))
+    logger.info(f"Oversampling with {processes} process(es): {oversampling_time:.2f} s wall "
+                f"({sampler_times}; sum {sum(r[2] for r in results):.2f} s), "
+                f"combine {combine_time:.3f} s")
+    return X_balanced, classes[y_codes]
+
+
+def _combine_oversampled(X, codes, results, target_samples):
+    """
+    Original rows plus the synthetic rows of every oversampler, without
+    duplicates and subsampled to at most target_samples.
+    :param results: (X_new, y_new, seconds) per oversampler, see _run_oversampler
+    :return: (X_balanced, class codes)
+    """
+    # Apvieno un noņem dublikātus (pirmā sastapšanās saglabā secību), bez starpposma DataFrame
+    X_all = np.concatenate([X] + [X_new for X_new, _, _ in results])
+    y_all = np.concatenate([codes] + [y_new for _, y_new, _ in results])
+    _, first = np.unique(np.column_stack([X_all, y_all]), axis=0, return_index=True)
+    keep = np.sort(first)
+
+    # Ierobežo kopējo paraugu skaitu, ja tas pārsniedz mērķi
+    if len(keep) > target_samples:
+        rng = np.random.RandomState(CONFIG['oversampling']['subsample_random_state'])
+        keep = keep[rng.choice(len(keep), target_samples, replace=False)]
+    return X_all[keep], y_all[keep]
+
+
 def prepare_data(generate_more_samples=True, target_samples=1000):
+    import pandas as pd
     from imblearn.over_sampling import SMOTE
+    from sklearn.preprocessing import StandardScaler
     logger = setup_logging()
+    start = time.perf_counter()
 
-    # Load and prepare data
-    df = pd.read_csv(CONFIG['data']['input_path'])
+    # Load and prepare data (memory-mapped columns, the CSV is parsed only once)
+    store = open_input_store()
 
     # Extract features and target
-    X = df[CONFIG['data']['feature_columns']]
-    y = df[CONFIG['data']['target_column']]
+    X = store.to_frame(CONFIG['data']['feature_columns'])
+    if CONFIG['features']['enabled']:
+        # Slīdošie vidējie, izmaiņas un izmaiņu ātrumi secībā, kādā rādījumi ierakstīti
+        X = add_rolling_features(X, store.column(CONFIG['features']['timestamp_column']))
+    y = pd.Series(np.asarray(store.column(CONFIG['data']['target_column'])),
+                  name=CONFIG['data']['target_column'])
 
     # Scale features
     scaler = StandardScaler()
@@ -44,62 +147,44 @@ def prepare_data(generate_more_samples=True, target_samples=1000):
     )
 
     # Save processed data for evaluation
-    processed_df = X_scaled.copy()
-    processed_df.to_csv(CONFIG['data']['processed_path'], index=False)
+    ColumnStore.write(CONFIG['data']['processed_store_path'],
+                      {name: X_scaled[name].to_numpy() for name in X_scaled.columns},
+                      source=store.source)
+    logger.info(f"Loaded, scaled and saved {len(X)} input rows in {time.perf_counter() - start:.2f} s")
+
+    # Sabalansētā datu kopa no iepriekšējās palaišanas ar tiem pašiem datiem un parametriem
+    use_cache = CONFIG['dataset_cache']['enabled']
+    if use_cache:
+        key = dataset_cache.dataset_key(generate_more_samples, target_samples)
+        cached = dataset_cache.load(key)
+        if cached is not None:
+            X_cached, y_cached = cached
+            logger.info(f"Loaded balanced dataset with {len(X_cached)} samples from cache ({key[:12]})")
+            return pd.DataFrame(X_cached, columns=X.columns), pd.Series(y_cached, name=y.name), scaler
 
     # Apply SMOTE for balance
+    oversampling = CONFIG['oversampling']
     try:
         logger.info(f"Original dataset size: {len(X)} samples")
         
         if generate_more_samples and len(X) < target_samples:
-            from imblearn.over_sampling import SMOTE, ADASYN, BorderlineSMOTE
-            import numpy as np
-            
-            # Standarta SMOTE
-            smote = SMOTE(random_state=42)
-            X_smote, y_smote = smote.fit_resample(X_scaled, y)
-            
-            # ADASYN - adapts the synthetic sample generation for each minority class
-            adasyn = ADASYN(random_state=43)
-            X_adasyn, y_adasyn = adasyn.fit_resample(X_scaled, y)
-            
-            # BorderlineSMOTE - focuses on samples near the boundary
-            bsmote = BorderlineSMOTE(random_state=44)
-            X_bsmote, y_bsmote = bsmote.fit_resample(X_scaled, y)
-            
-            # Apvieno visus sintētiskos datus
-            X_combined = pd.concat([
-                pd.DataFrame(X_smote, columns=X.columns),
-                pd.DataFrame(X_adasyn, columns=X.columns),
-                pd.DataFrame(X_bsmote, columns=X.columns)
-            ])
-            
-            y_combined = pd.concat([
-                pd.Series(y_smote),
-                pd.Series(y_adasyn),
-                pd.Series(y_bsmote)
-            ])
-            
-            # Ņem unikālus paraugus (novērš duplikātus)
-            combined_data = pd.concat([X_combined, y_combined.reset_index(drop=True)], axis=1)
-            combined_data = combined_data.drop_duplicates()
-            
-            # Ierobežo kopējo paraugu skaitu, ja tas pārsniedz mērķi
-            if len(combined_data) > target_samples:
-                combined_data = combined_data.sample(target_samples, random_state=42)
-            
-            # Atdala features un target atpakaļ
-            X_balanced = combined_data[X.columns]
-            y_balanced = combined_data[y.name]
-            
+            X_balanced, y_balanced = _oversample_combined(
+                X_scaled.to_numpy(), y.to_numpy(), target_samples, logger)
+            X_balanced = pd.DataFrame(X_balanced, columns=X.columns)
+            y_balanced = pd.Series(y_balanced, name=y.name)
+
             logger.info(f"Generated dataset with {len(X_balanced)} samples using multiple oversampling techniques")
-            
+            if use_cache:
+                dataset_cache.save(key, X_balanced, y_balanced)
+
             return X_balanced, y_balanced, scaler
         else:
             # Standarta SMOTE
-            smote = SMOTE(random_state=42)
+            smote = SMOTE(random_state=oversampling['smote_random_state'])
             X_balanced, y_balanced = smote.fit_resample(X_scaled, y)
             logger.info(f"Generated dataset with {len(X_balanced)} samples using standard SMOTE")
+            if use_cache:
+                dataset_cache.save(key, X_balanced, y_balanced)
             return pd.DataFrame(X_balanced, columns=X.columns), pd.Series(y_balanced), scaler
     except ValueError as e:
         logger.warning(f"SMOTE failed: {e}. Using original data.")
@@ -107,17 +192,190 @@ def prepare_data(generate_more_samples=True, target_samples=1000):
 
 
 
-def train(target_samples=1000):
+def _single_row_latency(forest, X_row, repeats):
+    """Median seconds for one predict_proba call on a single row."""
+    forest.predict_proba(X_row)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        forest.predict_proba(X_row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def select_pruned_model(X_train, y_train, latency_budget=None, accuracy_tolerance=None, logger=None):
+    """
+    Meklē mazāko mežu, kas iekļaujas latentuma budžetā un/vai precizitātes pielaidē.
+
+    The candidates are compared on a selection split carved out of the
+    training rows (CONFIG['pruning']['selection_size']), so the held-out
+    test split stays unseen and the accuracy reported on it unbiased. Each
+    depth in CONFIG['pruning']['max_depths'] is fitted once on the rest with
+    the largest tree count; smaller tree counts are prefixes of that forest,
+    scored from cumulative per-tree votes. Latency is that of the compiled
+    forest evaluator (the deployed inference path) on one row. The chosen
+    depth and tree count are then fitted on all training rows.
+
+    :param latency_budget: max single-row predict latency in milliseconds
+    :param accuracy_tolerance: max allowed accuracy drop vs the full model
+    :return: the selected model (the full configuration if nothing fits)
+    """
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+
+    logger = logger or logging.getLogger(__name__)
+    settings = CONFIG['pruning']
+    params = CONFIG['model_params']
+    n_full = params['n_estimators']
+    X_fit, X_select, y_fit, y_select = train_test_split(
+        X_train, y_train, test_size=settings['selection_size'], random_state=42)
+    X_select_values = np.asarray(X_select, dtype=np.float32)
+    y_select_values = np.asarray(y_select)
+    X_row = X_select_values[:1]
+
+    tree_counts = sorted({n for n in settings['tree_counts'] if n < n_full} | {n_full})
+    depths = list(dict.fromkeys([params['max_depth']] + list(settings['max_depths'])))
+
+    candidates = []
+    for max_depth in depths:
+        forest = get_model_class()(**dict(params, max_depth=max_depth, n_estimators=tree_counts[-1]))
+        forest.fit(X_fit, y_fit)
+        compiled = CompiledForest.from_sklearn(forest)
+        node_counts = np.cumsum([tree.tree_.node_count for tree in forest.estimators_])
+
+        # Cumulative votes: accuracy of every prefix from one pass over the trees
+        votes = np.cumsum([tree.predict_proba(X_select_values) for tree in forest.estimators_], axis=0)
+
+        for n_trees in tree_counts:
+            predicted = forest.classes_[np.argmax(votes[n_trees - 1], axis=1)]
+            candidates.append({
+                'max_depth': max_depth,
+                'n_estimators': n_trees,
+                'n_nodes': int(node_counts[n_trees - 1]),
+                'accuracy': accuracy_score(y_select_values, predicted),
+                'latency_ms': _single_row_latency(compiled.prefix(n_trees), X_row,
+                                                  settings['latency_repeats']) * 1e3,
+            })
+
+    full_accuracy = next(c['accuracy'] for c in candidates
+                         if c['max_depth'] == params['max_depth'] and c['n_estimators'] == n_full)
+    logger.info(f"Accuracy vs latency trade-off on {len(y_select_values)} selection rows "
+                f"(full model accuracy {full_accuracy:.4f}):")
+    logger.info(f"{'depth':>6} {'trees':>6} {'nodes':>8} {'accuracy':>9} {'latency ms':>11}")
+    for c in candidates:
+        logger.info(f"{c['max_depth']:>6} {c['n_estimators']:>6} {c['n_nodes']:>8} "
+                    f"{c['accuracy']:>9.4f} {c['latency_ms']:>11.3f}")
+
+    eligible = candidates
+    if accuracy_tolerance is not None:
+        eligible = [c for c in eligible if c['accuracy'] >= full_accuracy - accuracy_tolerance]
+    if latency_budget is not None:
+        eligible = [c for c in eligible if c['latency_ms'] <= latency_budget]
+
+    if not eligible:
+        logger.warning("No pruned forest satisfies the latency budget / accuracy tolerance, "
+                       "keeping the full model")
+        return get_model_class()(**params).fit(X_train, y_train)
+
+    if accuracy_tolerance is not None:
+        # Smallest model within tolerance
+        best = min(eligible, key=lambda c: (c['n_nodes'], -c['accuracy']))
+    else:
+        # Most accurate model within the latency budget, smaller on ties
+        best = max(eligible, key=lambda c: (c['accuracy'], -c['n_nodes']))
+
+    logger.info(f"Selected forest: max_depth={best['max_depth']}, n_estimators={best['n_estimators']}, "
+                f"nodes={best['n_nodes']}, accuracy={best['accuracy']:.4f}, "
+                f"latency={best['latency_ms']:.3f} ms")
+    best_params = dict(params, max_depth=best['max_depth'], n_estimators=best['n_estimators'])
+    return get_model_class()(**best_params).fit(X_train, y_train)
+
+
+def save_evaluation(model, X_test, y_test):
+    """
+    Persists the held-out split (row positions in the balanced set, scaled
+    features, labels) and the model's scores on it: metrics, predictions and
+    probabilities through save_metrics, plus the feature importances.
+    :return: the saved metrics dict
+    """
+    data = CONFIG['data']
+    columns = {'index': np.asarray(X_test.index)}
+    for name in X_test.columns:
+        columns[name] = np.asarray(X_test[name])
+    columns[data['target_column']] = np.asarray(y_test).astype(str)
+    ColumnStore.write(CONFIG['artifacts']['test_set_path'], columns,
+                      source={'split': 'test'})
+
+    metrics = compute_metrics(model, X_test, y_test, X_test.index)
+    save_metrics(metrics)
+    if hasattr(model, 'feature_importances_'):
+        save_feature_importance(list(X_test.columns), model.feature_importances_)
+    return metrics
+
+
+def save_training_history(model, X_test, y_test):
+    """
+    Saves the held-out accuracy of every forest prefix (first 1, 2, ... n
+    trees) as the learning curve shown by the statistics window. Prefix
+    predictions come from running sums of the per-tree probabilities, the
+    same soft vote the forest uses, so no forest is retrained.
+    :return: {'iterations': tree counts, 'accuracy': accuracy per tree count}
+    """
+    import joblib
+
+    X_values = np.asarray(X_test, dtype=np.float32)
+    y_values = np.asarray(y_test)
+    votes = np.zeros((len(X_values), len(model.classes_)))
+    accuracy = np.empty(len(model.estimators_))
+    for i, tree in enumerate(model.estimators_):
+        votes += tree.predict_proba(X_values)
+        accuracy[i] = np.mean(model.classes_[np.argmax(votes, axis=1)] == y_values)
+
+    history = {'iterations': np.arange(1, len(accuracy) + 1), 'accuracy': accuracy,
+               'metric': 'held-out accuracy by number of trees', 'test_size': len(y_values)}
+    path = CONFIG['artifacts']['history_path']
+    joblib.dump(history, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return history
+
+
+def train(target_samples=1000, latency_budget=None, accuracy_tolerance=None, progress=None, force=False):
     """
     Trenē mašīnmācības modeli ar iespēju ģenerēt vairāk sintētisko datu.
     
     :param target_samples: cik paraugus mērķēt ģenerēt apmācībai (noklusējums: 1000)
+    :param latency_budget: ja norādīts, maksimālais vienas prognozes latentums (ms);
+                           tiek saglabāts mazākais mežs, kas tajā iekļaujas
+    :param accuracy_tolerance: ja norādīts, pieļaujamais precizitātes kritums
+                               salīdzinot ar pilno modeli
+    :param progress: ja norādīts, callback(stage, fraction), ko izsauc katra posma sākumā
+    :param force: trenēt arī tad, ja kešā jau ir modelis ar tādiem pašiem datiem un konfigurāciju
     :return: apmācītais modelis un datu skalētājs
     """
+    import joblib
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import confusion_matrix
+
     logger = setup_logging()
     logger.info(f"Starting model training with target {target_samples} samples...")
 
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    # Ja dati un konfigurācija nav mainījušies, izmanto iepriekš apmācīto modeli
+    use_cache = CONFIG['training_cache']['enabled']
+    if use_cache:
+        train_kwargs = {'target_samples': target_samples, 'latency_budget': latency_budget,
+                         'accuracy_tolerance': accuracy_tolerance}
+        key = training_cache.training_fingerprint(**train_kwargs)
+        if not force and training_cache.install(key, train_kwargs):
+            logger.info(f"Data and config unchanged (fingerprint {key[:12]}), using cached artifacts")
+            publish_version(fingerprint=key)
+            return joblib.load(CONFIG['artifacts']['model_path']), joblib.load(CONFIG['artifacts']['scaler_path'])
+
     # Prepare data with more samples
+    report('prepare_data', 0.0)
     X, y, scaler = prepare_data(generate_more_samples=True, target_samples=target_samples)
 
     # Ensure we have enough samples
@@ -149,44 +407,70 @@ def train(target_samples=1000):
         X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
         y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
 
-    # Initialize and train model with improved hyperparameters
-    model = CONFIG['model_class'](
-        n_estimators=500,  # Palielināts no 200 uz 500
-        max_depth=15,      # Palielināts no 10 uz 15
-        min_samples_split=2,
-        min_samples_leaf=1,
-        class_weight='balanced',
-        random_state=42,
-        bootstrap=True,    # Bootstrapping uzlabos dažādību
-        n_jobs=-1          # Izmantot visus pieejamos procesora kodolus
-    )
-    
-    # Train model
-    print(f"Training model on {len(X_train)} samples...")
-    model.fit(X_train, y_train)
+    if latency_budget is not None or accuracy_tolerance is not None:
+        # The smallest forest that fits the budget, chosen without looking at the test split
+        report('prune', 0.2)
+        print(f"Selecting and training a pruned model on {len(X_train)} samples...")
+        model = select_pruned_model(X_train, y_train,
+                                    latency_budget=latency_budget,
+                                    accuracy_tolerance=accuracy_tolerance,
+                                    logger=logger)
+    else:
+        # Initialize and train model with improved hyperparameters
+        model = get_model_class()(**CONFIG['model_params'])
 
-    # Save model and scaler
+        # Train model
+        report('fit', 0.2)
+        print(f"Training model on {len(X_train)} samples...")
+        model.fit(X_train, y_train)
+
+    # Save model and scaler; readers in other processes never see a partial file
+    report('save', 0.7)
     os.makedirs(CONFIG['artifacts']['base_path'], exist_ok=True)
-    joblib.dump(model, CONFIG['artifacts']['model_path'])
-    joblib.dump(scaler, CONFIG['artifacts']['scaler_path'])
+    for obj, path in ((model, CONFIG['artifacts']['model_path']), (scaler, CONFIG['artifacts']['scaler_path'])):
+        joblib.dump(obj, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    # Flattened node tables for the low-latency evaluator
+    report('export', 0.75)
+    export_compiled(model)
+    fused = export_fused(model, scaler)
 
-    # Evaluate
-    y_pred = model.predict(X_test)
+    # Probability table over the operating envelope (a grid over the raw readings only)
+    if CONFIG['lut']['build_after_train'] and not CONFIG['features']['enabled']:
+        report('lut', 0.85)
+        build_lut(fused)
+    else:
+        # The previous model's table must not be cached or published with this one
+        shutil.rmtree(CONFIG['artifacts']['lut_path'], ignore_errors=True)
 
-    # Print metrics only if we have test samples
+    # Saglabā precīzo testa kopu, prognozes un metrikas, lai model.evaluate nav jāsadala dati no jauna
+    report('evaluate', 0.9)
     if len(y_test) > 0:
+        metrics = save_evaluation(model, X_test, y_test)
+        if hasattr(model, 'estimators_'):
+            save_training_history(model, X_test, y_test)
+        y_pred = np.asarray(metrics['predictions'])
+
         print(f"Model trained on {len(X_train)} samples and tested on {len(X_test)} samples")
-        print(f"Accuracy: {accuracy_score(y_test, y_pred):.2f}")
+        print(f"Accuracy: {metrics['accuracy']:.2f}")
         print(f"Confusion matrix:\n {confusion_matrix(y_test, y_pred)}")
-        print(f"Classification report:\n {classification_report(y_test, y_pred)}")
+        print(f"Classification report:\n {metrics['report']}")
         
         # Parāda F1 score, kas ir svarīgs balansētai klasifikācijai
-        from sklearn.metrics import f1_score
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        print(f"Weighted F1 Score: {f1:.4f}")
+        print(f"Weighted F1 Score: {metrics['f1_weighted']:.4f}")
     else:
         print("Warning: No test samples available for evaluation")
 
+    if use_cache:
+        report('cache', 0.95)
+        training_cache.store(key, train_kwargs)
+
+    # Jaunā versija kļūst aktīva visiem lasītājiem (GUI, serveri) vienā atomārā solī
+    report('publish', 0.98)
+    version = publish_version(fingerprint=key if use_cache else None)
+    logger.info(f"Published model version {version}")
+
     return model, scaler
 
 
@@ -197,8 +481,17 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Train the anomaly detection model')
     parser.add_argument('--samples', type=int, default=1000, 
                         help='Target number of samples to generate (default: 1000)')
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help='Max single-row prediction latency in ms; saves the smallest forest within it')
+    parser.add_argument('--accuracy-tolerance', type=float, default=None,
+                        help='Max accuracy drop vs the full model allowed when pruning (e.g. 0.01)')
+    parser.add_argument('--force', action='store_true',
+                        help='Retrain even if the data and config are unchanged')
     
     args = parser.parse_args()
     
     # Trenē modeli ar norādīto paraugu skaitu
-    train(target_samples=args.samples)
+    train(target_samples=args.samples,
+          latency_budget=args.latency_budget,
+          accuracy_tolerance=args.accuracy_tolerance,
+          force=args.force)
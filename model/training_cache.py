@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+from model.config import CONFIG
+from model.registry import _file_hash, _link_or_copy
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the training pipeline changes in a way that makes old artifacts stale
+PIPELINE_VERSION = 4
+
+
+def _artifact_paths():
+    """Name in the cache entry -> live path of every artifact train() produces."""
+    artifacts = CONFIG['artifacts']
+    return {
+        'model.pkl': artifacts['model_path'],
+        'scaler.pkl': artifacts['scaler_path'],
+        'processed_data': CONFIG['data']['processed_store_path'],
+        'forest_compiled': artifacts['compiled_path'],
+        'forest_fused': artifacts['fused_path'],
+        'forest_lut': artifacts['lut_path'],
+        'test_set': artifacts['test_set_path'],
+        'metrics.json': artifacts['metrics_path'],
+        'feature_importance.csv': artifacts['feature_importance_path'],
+        'training_history.pkl': artifacts['history_path'],
+    }
+
+
+def training_fingerprint(target_samples=1000, latency_budget=None, accuracy_tolerance=None):
+    """
+    SHA-256 key of everything the trained artifacts depend on: the input CSV
+    contents, the feature/target config, the model class and
+    hyperparameters, and the train() arguments.
+    """
+    data = CONFIG['data']
+    pruning = latency_budget is not None or accuracy_tolerance is not None
+    description = {
+        'pipeline_version': PIPELINE_VERSION,
+        'input_sha256': _file_hash(data['input_path']),
+        'feature_columns': data['feature_columns'],
+        'target_column': data['target_column'],
+        'random_state': data['random_state'],
+        'model_class': CONFIG['model_class'] if isinstance(CONFIG['model_class'], str)
+        else f"{CONFIG['model_class'].__module__}.{CONFIG['model_class'].__qualname__}",
+        'model_params': CONFIG['model_params'],
+        'oversampling': CONFIG['oversampling'],
+        'features': CONFIG['features'],
+        'target_samples': target_samples,
+        'latency_budget': latency_budget,
+        'accuracy_tolerance': accuracy_tolerance,
+        'pruning': CONFIG['pruning'] if pruning else None,
+        'lut': CONFIG['lut'],
+    }
+    encoded = json.dumps(description, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _read_fingerprint():
+    try:
+        with open(CONFIG['artifacts']['fingerprint_path']) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def installed_fingerprint():
+    """Fingerprint of the artifacts currently in place, or None if unknown."""
+    return _read_fingerprint().get('fingerprint')
+
+
+def installed_train_kwargs():
+    """train() arguments the artifacts in place were trained with ({} if unknown)."""
+    return _read_fingerprint().get('train_kwargs') or {}
+
+
+def is_model_current(**train_kwargs):
+    """
+    True if the live artifacts were trained from the current data and config.
+    train() arguments that are not given are those the artifacts were trained
+    with, so e.g. a model trained with --accuracy-tolerance is not stale.
+    """
+    kwargs = dict(installed_train_kwargs(), **train_kwargs)
+    return (os.path.exists(CONFIG['artifacts']['model_path'])
+            and installed_fingerprint() == training_fingerprint(**kwargs))
+
+
+def _entry_path(key):
+    return os.path.join(CONFIG['training_cache']['path'], key)
+
+
+def _copy_file(src, dst):
+    """Links (or copies) via a temporary name so readers never see a partial file."""
+    # rename() is a no-op between two links to the same file
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+    if os.path.lexists(dst + '.tmp'):
+        os.remove(dst + '.tmp')
+    _link_or_copy(src, dst + '.tmp')
+    os.replace(dst + '.tmp', dst)
+
+
+def _copy_artifact(src, dst):
+    if os.path.isdir(src):
+        # Artifact directories are read through their manifest, so it goes last
+        os.makedirs(dst, exist_ok=True)
+        names = sorted(os.listdir(src), key=lambda name: name == 'manifest.json')
+        for name in names:
+            _copy_file(os.path.join(src, name), os.path.join(dst, name))
+    else:
+        _copy_file(src, dst)
+
+
+def _write_fingerprint(key, train_kwargs=None):
+    path = CONFIG['artifacts']['fingerprint_path']
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'fingerprint': key, 'train_kwargs': train_kwargs or {}, 'time': time.time()}, f, indent=4)
+    os.replace(path + '.tmp', path)
+
+
+def store(key, train_kwargs=None):
+    """
+    Links (or copies) the live artifacts into the cache entry for key and marks them installed.
+    :param train_kwargs: the train() arguments key was computed from
+    """
+    entry = _entry_path(key)
+    tmp_entry = entry + '.tmp'
+    shutil.rmtree(tmp_entry, ignore_errors=True)
+    os.makedirs(tmp_entry)
+    for name, path in _artifact_paths().items():
+        if os.path.exists(path):
+            _copy_artifact(path, os.path.join(tmp_entry, name))
+
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(tmp_entry, entry)
+    _write_fingerprint(key, train_kwargs)
+    _evict()
+
+
+def install(key, train_kwargs=None):
+    """
+    Makes the cached artifacts for key the live ones.
+    :return: True if the cache had a complete entry for key
+    """
+    entry = _entry_path(key)
+    if not os.path.exists(os.path.join(entry, 'model.pkl')):
+        return False
+
+    if installed_fingerprint() != key:
+        for name, path in _artifact_paths().items():
+            src = os.path.join(entry, name)
+            if os.path.exists(src):
+                _copy_artifact(src, path)
+            elif os.path.isdir(path):
+                # Not produced by that run (e.g. no LUT); the live one belongs to another model
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        _write_fingerprint(key, train_kwargs)
+    # Recently used entries are evicted last
+    os.utime(entry)
+    return True
+
+
+def _evict():
+    """Keeps at most CONFIG['training_cache']['max_entries'] entries, dropping the least recently used."""
+    root = CONFIG['training_cache']['path']
+    entries = [os.path.join(root, name) for name in os.listdir(root) if not name.endswith('.tmp')]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for entry in entries[CONFIG['training_cache']['max_entries']:]:
+        logger.info(f"Evicting cached training artifacts {os.path.basename(entry)}")
+        shutil.rmtree(entry, ignore_errors=True)
@@ -3,15 +3,16 @@ import os
 from datetime import datetime
 import json
 import numpy as np
-import pandas as pd
 from .config import CONFIG
 
 class NumpyEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, np.ndarray):
             return obj.tolist()
-        if isinstance(obj, np.float32):
+        if isinstance(obj, np.floating):
             return float(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
         return super(NumpyEncoder, self).default(obj)
 
 def setup_logging():
@@ -37,15 +38,22 @@ def setup_logging():
 
 def save_metrics(metrics_dict):
     """Save metrics to JSON file"""
-    os.makedirs(os.path.dirname(CONFIG['artifacts']['metrics_path']), exist_ok=True)
-    with open(CONFIG['artifacts']['metrics_path'], 'w') as f:
+    path = CONFIG['artifacts']['metrics_path']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Lasītāji (GUI) nekad neredz daļēji ierakstītu failu
+    with open(path + '.tmp', 'w') as f:
         json.dump(metrics_dict, f, cls=NumpyEncoder, indent=4)
+    os.replace(path + '.tmp', path)
 
 def save_feature_importance(feature_names, importance_scores):
     """Save feature importance scores"""
+    import pandas as pd
+
     importance_df = pd.DataFrame({
         'feature': feature_names,
         'importance': importance_scores
     }).sort_values('importance', ascending=False)
     
-    importance_df.to_csv(CONFIG['artifacts']['feature_importance_path'], index=False)
\ No newline at end of file
+    path = CONFIG['artifacts']['feature_importance_path']
+    importance_df.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
\ No newline at end of file
@@ -1,3 +1,5 @@
+from model.background import start_background_training
+from model.training_cache import installed_train_kwargs, is_model_current
 from scada_gui.main_window import run_main_window
 import argparse
 
@@ -5,17 +7,21 @@ if __name__ == '__main__':
     # Pievieno komandlīnijas argumentu apstrādi
     parser = argparse.ArgumentParser(description='Start SCADA system with model training options')
     parser.add_argument('--retrain', action='store_true', help='Force model retraining')
-    parser.add_argument('--samples', type=int, default=1000, 
-                        help='Target number of samples for model training (default: 1000)')
+    parser.add_argument('--samples', type=int, default=None,
+                        help='Target number of samples for model training '
+                             '(default: as the installed model was trained, else 1000)')
     
     args = parser.parse_args()
     
-    # Pārbauda vai ir nepieciešams trenēt modeli
-    if not os.path.exists('model/artifacts/model.pkl') or args.retrain:
-        print(f"{'Model not found. Training' if not os.path.exists('model/artifacts/model.pkl') else 'Retraining'} model with {args.samples} samples...")
-        train(target_samples=args.samples)
+    # Pārbauda vai ir nepieciešams trenēt modeli; nenorādītie argumenti - kā esošajam modelim
+    train_kwargs = {} if args.samples is None else {'target_samples': args.samples}
+    if args.retrain or not is_model_current(**train_kwargs):
+        train_kwargs = dict(installed_train_kwargs(), **train_kwargs)
+        print(f"{'Retraining' if args.retrain else 'Model missing or out of date. Training'} model "
+              f"with {train_kwargs.get('target_samples', 1000)} samples...")
+        start_background_training(force=args.retrain, **train_kwargs)
     else:
-        print("Model already exists. Skipping training.")
+        print("Model is up to date. Skipping training.")
 
     # Startē GUI
     run_main_window()
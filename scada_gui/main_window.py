@@ -5,6 +5,9 @@ from scada_gui.process_window2 import open_process2
 from scada_gui.process_window3 import open_process3
 from scada_gui.plc_simulation import open_plc_simulation as open_plc_sim
 from communication.hmi import ProcessControlHMI
+from model.predict import enable_prediction_cache
+from model.registry import start_watcher
+from model.background import get_training_status
 from PyQt5.QtWidgets import QApplication
 import sys
 
@@ -33,6 +36,11 @@ def open_hmi():
         app.exec_()
 
 def run_main_window():
+    # Procesu logi vērtē ļoti līdzīgus rādījumus - kešojam prognozes
+    enable_prediction_cache()
+    # Jauni modeļa varianti (fona apmācība) tiek ielādēti bez GUI restartēšanas
+    start_watcher()
+
     root = tk.Tk()
     root.title("Autors - Linards Tomass Bekeris")
     root.geometry("700x900")
@@ -92,4 +100,22 @@ def run_main_window():
         btn.pack(pady=10)
         apply_hover_effects(btn, normal_bg="#555555", hover_bg="#777777")
 
+    # Fona apmācības statuss
+    training_label = tk.Label(root, text="", font=("Arial", 12), bg="#333333", fg="#ffaa00")
+    training_label.pack(pady=10)
+    update_training_status(root, training_label)
+
     root.mainloop()
+
+
+def update_training_status(root, label):
+    """Atjauno fona apmācības statusu galvenajā logā (Tk pavedienā)"""
+    status = get_training_status()
+    if status['state'] == 'training':
+        label.config(text=f"Modelis tiek apmācīts: {status['stage']} "
+                          f"({status['progress'] * 100:.0f}%, {status['elapsed']:.0f} s)", fg="#ffaa00")
+        root.after(500, update_training_status, root, label)
+    elif status['state'] == 'done':
+        label.config(text=f"Modelis apmācīts ({status['elapsed']:.0f} s)", fg="#66cc66")
+    elif status['state'] == 'failed':
+        label.config(text=f"Modeļa apmācība neizdevās: {status['error']}", fg="#ff6666")
@@ -0,0 +1,52 @@
+import os
+
+from model.background import get_training_status, is_training
+from model.config import CONFIG
+from model.predict import predict
+from model.registry import current_version
+
+# Cik bieži (ms) logi pārbauda, vai modelis jau ir apmācīts
+POLL_INTERVAL_MS = 1000
+
+
+def training_text():
+    """Statusa teksts, kamēr fonā notiek modeļa apmācība"""
+    status = get_training_status()
+    return f"MODELIS TIEK APMĀCĪTS ({status['progress'] * 100:.0f}%, {status['stage']})"
+
+
+def predict_when_ready(data):
+    """
+    Returns predict(data), or None while the first model is being trained in
+    the background. Predictions continue during retraining on the current
+    version, or on the working model.pkl/scaler.pkl if none has been
+    published yet (e.g. artifacts from before versioning), and switch to the
+    new version when it is published.
+    """
+    if is_training() and current_version() is None and not _working_artifacts_exist():
+        return None
+    return predict(data)
+
+
+def _working_artifacts_exist():
+    artifacts = CONFIG['artifacts']
+    return os.path.exists(artifacts['model_path']) and os.path.exists(artifacts['scaler_path'])
+
+
+def wait_for_model(widget, on_ready, on_progress=None):
+    """
+    Polls the background training from the Tk event loop and calls
+    on_ready() once it has finished; on_progress(text) on every poll before.
+    Does nothing more once the widget has been closed.
+    """
+    def poll():
+        if not widget.winfo_exists():
+            return
+        if is_training():
+            if on_progress is not None:
+                on_progress(training_text())
+            widget.after(POLL_INTERVAL_MS, poll)
+        else:
+            on_ready()
+
+    widget.after(POLL_INTERVAL_MS, poll)
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import random
-from model.predict import predict
+from scada_gui.model_status import predict_when_ready
 import tkinter as tk
 from tkinter import ttk
 import time
@@ -458,7 +458,7 @@ def show_simple_process1():
             }
         
         # Get prediction from model (but we'll override it for demo purposes)
-        pred = predict(data)
+        pred = predict_when_ready(data)
         
         # Debug print to see what model predicts
         print(f"Process 1 - Generated data: {data}, Prediction: {pred}")
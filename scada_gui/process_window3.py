@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import random
-from model.predict import predict
+from scada_gui.model_status import predict_when_ready, training_text, wait_for_model
 import time
 import math
 
@@ -504,7 +504,7 @@ def show_simple_process3():
         }
             
         # Get prediction from model
-        pred = predict(data)
+        pred = predict_when_ready(data)
         
         # Normal operating ranges (for display)
         normal_ranges = {
@@ -552,10 +552,16 @@ def show_simple_process3():
         status_label.pack(side="left", padx=(0, 5))
         
         # Display status based on model prediction
-        if pred == "FAULT":
-            result_label = ttk.Label(status_frame, text="ANOMĀLIJA", foreground="red", font=("Arial", 10, "bold"))
+        if pred is None:
+            # Modelis vēl tiek apmācīts fonā - parāda progresu un prognozē, tiklīdz tas ir gatavs
+            result_label = ttk.Label(status_frame, text=training_text(), foreground="orange", font=("Arial", 10, "bold"))
+            wait_for_model(
+                win,
+                on_ready=lambda: show_prediction(result_label, predict_when_ready(data)),
+                on_progress=lambda text: result_label.configure(text=text))
         else:
-            result_label = ttk.Label(status_frame, text="NORMĀLS", foreground="green", font=("Arial", 10, "bold"))
+            result_label = ttk.Label(status_frame, font=("Arial", 10, "bold"))
+            show_prediction(result_label, pred)
         result_label.pack(side="left")
         
         # Refresh button
@@ -572,6 +578,12 @@ def show_simple_process3():
         messagebox.showerror("Kļūda", f"Radās kļūda: {str(e)}")
         win.destroy()
 
+def show_prediction(result_label, pred):
+    if pred == "FAULT":
+        result_label.configure(text="ANOMĀLIJA", foreground="red")
+    else:
+        result_label.configure(text="NORMĀLS", foreground="green")
+
 def refresh_data(win):
     win.destroy()
     show_simple_process3()
@@ -9,6 +9,10 @@ matplotlib.use("TkAgg")
 import pandas as pd
 import joblib
 from model.config import CONFIG
+from model.registry import current_artifact_path, get_artifacts
+from model.columnar import open_input_store, open_processed_store
+from model.background import is_training
+from scada_gui.model_status import training_text, wait_for_model
 import os
 import logging
 import matplotlib.patches as mpatches
@@ -47,6 +51,31 @@ class StatisticsWindow:
         tk.Label(self.summary_tab, text="Modeļa statistikas rezultāti",
                 font=("Arial", 18, "bold")).pack(pady=10)
         
+        # Kamēr modelis tiek apmācīts fonā, rāda statusu un ielādē statistiku pēc tam
+        if is_training():
+            self.show_training_status()
+        else:
+            self.load_statistics()
+
+    def show_training_status(self):
+        self.status_labels = []
+        for tab in [self.summary_tab, self.confusion_tab, self.history_tab]:
+            label = tk.Label(tab, text=training_text(), fg="orange", font=("Arial", 12, "bold"))
+            label.pack(pady=20)
+            self.status_labels.append(label)
+
+        def on_progress(text):
+            for label in self.status_labels:
+                label.configure(text=text)
+
+        def on_ready():
+            for label in self.status_labels:
+                label.destroy()
+            self.load_statistics()
+
+        wait_for_model(self.win, on_ready, on_progress)
+
+    def load_statistics(self):
         # Mēģinam iegūt statistikas datus
         try:
             self.results = evaluate()
@@ -75,20 +104,19 @@ class StatisticsWindow:
     
     def load_model_data(self):
         """Ielādē modeli un datus analīzei"""
-        self.model = joblib.load(CONFIG['artifacts']['model_path'])
+        self.model, _ = get_artifacts()
         
         # Ielādē treniņa datus, ja tie eksistē
         try:
-            self.train_data = pd.read_csv(CONFIG['data']['processed_path'])
-            self.original_data = pd.read_csv(CONFIG['data']['input_path'])
+            self.train_data = open_processed_store().to_frame()
+            self.original_data = open_input_store().to_frame()
         except:
             self.train_data = None
             self.original_data = None
         
         # Ielādē apmācības vēsturi, ja tā ir pieejama
         try:
-            model_dir = os.path.dirname(CONFIG['artifacts']['model_path'])
-            history_path = os.path.join(model_dir, 'training_history.pkl')
+            history_path = current_artifact_path('history_path')
             
             if os.path.exists(history_path):
                 self.training_history = joblib.load(history_path)
@@ -116,8 +144,10 @@ class StatisticsWindow:
         if hasattr(self, 'training_history') and self.training_history is not None:
             try:
                 # Izmantojam faktisko apmācības vēsturi
-                iterations = self.training_history['iterations']
-                historical_acc = self.training_history['accuracy']
+                # Precizitāte testa kopā atkarībā no koku skaita
+                iterations = np.asarray(self.training_history['iterations'])
+                historical_acc = np.asarray(self.training_history['accuracy'])
+                x_label = 'Koku skaits'
                 print("Izmantojam saglabāto apmācības vēsturi")
             except Exception as e:
                 print(f"Kļūda ielādējot apmācības vēsturi: {str(e)}")
@@ -152,30 +182,35 @@ class StatisticsWindow:
             
             # Pievienojam pašreizējo precizitāti kā pēdējo vērtību
             historical_acc.append(accuracy)
+            x_label = 'Trenēšanas iterācija'
         
-        # Zīmējam zigzag līniju ar marķieriem
-        ax1.plot(iterations, historical_acc, 'o-', linewidth=2, color='#4CAF50', markersize=8, label='Modeļa precizitāte')
+        # Zīmējam līniju; marķieri tikai, ja punktu nav pārāk daudz
+        many_points = len(iterations) > 30
+        ax1.plot(iterations, historical_acc, '-' if many_points else 'o-', linewidth=2, color='#4CAF50',
+                 markersize=8, label='Modeļa precizitāte')
         
         # Pievienojam horizontālu līniju, kas norāda optimālo vērtību (1.0)
         ax1.axhline(y=1.0, color='#F44336', linestyle='--', alpha=0.7, label='Optimālā precizitāte')
         
         # Pievienojam vērtības virs dažiem punktiem (ne visiem, lai būtu pārskatāmi)
-        for i in [0, 3, 6, 9]:
+        for i in np.unique(np.linspace(0, len(iterations) - 1, 4).astype(int)):
             ax1.text(iterations[i], historical_acc[i] + 0.03, f"{historical_acc[i]:.2f}", ha='center')
         
         # Izceļam pašreizējo vērtību
-        ax1.text(iterations[-1] + 0.3, historical_acc[-1], f"Pašreizējā: {historical_acc[-1]:.2f}", 
+        x_margin = max(0.5, (iterations[-1] - iterations[0]) * 0.05)
+        ax1.text(iterations[-1] + x_margin * 0.6, historical_acc[-1], f"Pašreizējā: {historical_acc[-1]:.2f}", 
                  ha='left', va='center', fontweight='bold',
                  bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="#4CAF50", alpha=0.8))
         
         # Pielāgojam grafika noformējumu
-        ax1.set_xlabel('Trenēšanas iterācija')
+        ax1.set_xlabel(x_label)
         ax1.set_ylabel('Precizitāte')
         ax1.set_title('Modeļa precizitātes izaugsme', fontsize=12)
         ax1.grid(True, linestyle='--', alpha=0.7)
         ax1.set_ylim(max(0, min(historical_acc) - 0.05), 1.05)
-        ax1.set_xlim(0.5, epochs + 0.5)
-        ax1.set_xticks(iterations)
+        ax1.set_xlim(iterations[0] - x_margin, iterations[-1] + x_margin)
+        if not many_points:
+            ax1.set_xticks(iterations)
         ax1.legend(loc='lower right')
         
         # Iekrāsojam zonu zem līknes